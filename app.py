@@ -1,4 +1,6 @@
 import streamlit as st
+from functools import partial
+from inspect import signature
 from datetime import datetime, timedelta # Added for show_login_page (used by its expander/demo section if any part uses it)
 from database.init_db import check_and_initialize_database
 from auth.permissions import get_allowed_navigation_items
@@ -34,7 +36,7 @@ from datetime import date # Already have datetime, timedelta. Ensure date is dir
 import pandas as pd # Already available via mock AnalyticsService if that's defined above. Ensure it's here.
 from typing import Dict, List, Any # Standard typing
 from auth.permissions import require_role_access
-from services.analytics_service import AnalyticsService # get_user_dashboard_metrics is not a separate import from the provided file
+from services.analytics_service import get_analytics_service # Shared process-wide AnalyticsService instance
 # Assuming MetricCard is generic enough. For others, add mocks if not available.
 try:
     from components.cards import MetricCard, AnalyticsCard, ActivityCard, render_card_grid
@@ -68,6 +70,35 @@ try:
 except ImportError:
     if "PrescriptionCard" not in globals(): # Check if already mocked by another page
         def PrescriptionCard(prescription_data, actions, key): st.info(f"PrescriptionCard (mock) for {prescription_data.get('prescription_id')}")
+# Imports for Doctor's Today's Patients Page
+try:
+    from components.cards import PatientCard
+except ImportError:
+    if "PatientCard" not in globals():
+        def PatientCard(patient_data, actions, key): st.info(f"PatientCard (mock) for {patient_data.get('name')}")
+
+# Card signatures are resolved once: the mocks take actions/key, components.cards classes take action_callbacks and need render()
+_PATIENT_CARD_PARAMS = frozenset(signature(PatientCard).parameters)
+_PRESCRIPTION_CARD_PARAMS = frozenset(signature(PrescriptionCard).parameters)
+
+def _card_actions(handler, action_names, data: dict) -> dict:
+    """Maps each action name to handler(action_name, data); the names come from module-level tuples, not per-row closures."""
+    return {name: partial(handler, name, data) for name in action_names}
+
+def _call_ignoring_card_data(fn, _card_data):
+    fn()
+
+def _render_card_component(card, card_params, data_kwarg: str, data: dict, actions: dict, key: str):
+    """Renders a card component, whichever of the two card signatures it has."""
+    try:
+        if 'actions' in card_params:
+            card(**{data_kwarg: data}, actions=actions, key=key)
+        else:
+            # Class-based cards pass their data to the callback; the actions here take no arguments
+            callbacks = {label: partial(_call_ignoring_card_data, fn) for label, fn in actions.items()}
+            card(**{data_kwarg: data}, action_callbacks=callbacks).render()
+    except Exception as e:
+        st.error(f"Could not display card: {e}")
 try:
     from components.forms import PrescriptionMedicationComponent, PrescriptionLabTestComponent
     # SearchFormComponent already imported/mocked
@@ -81,33 +112,23 @@ except ImportError:
             st.info("PrescriptionLabTestComponent (mock)")
             return current_lab_tests # Pass through
 
-try:
-    from services.ai_service import AIAnalysisService, is_ai_available
-except ImportError:
-    if "AIAnalysisService" not in globals():
-        class AIAnalysisService: pass # Simple mock
-    if "is_ai_available" not in globals():
-        def is_ai_available(): return False # Default to false if service not there
-
-try:
-    from services.pdf_service import generate_prescription_pdf, get_pdf_filename, create_download_link
-except ImportError:
-    def generate_prescription_pdf(rx_data): st.info("generate_prescription_pdf (mock)"); return b"PDF_CONTENT_MOCK"
-    def get_pdf_filename(rx_data): return "mock_prescription.pdf"
-    def create_download_link(content, filename, label): st.info(f"Download link for {filename} (mock)")
+# services.ai_service and services.pdf_service are imported where they are used, not at startup
 
 
 # Updated database queries import to include all necessary for SA Dashboard
 from database.queries import (
     DashboardQueries, TemplateQueries, VisitQueries, PatientQueries,
     AnalyticsQueries, UserQueries, PrescriptionQueries, get_entity_counts,
-    MedicationQueries, LabTestQueries # Added for prescription page
+    MedicationQueries, LabTestQueries, # Added for prescription page
+    get_all_medications, get_all_lab_tests
 )
 # Updated formatters import
 from utils.formatters import format_date_display, format_time_display, format_percentage, format_currency, format_patient_name
 # from utils.helpers import show_error_message, show_success_message, show_warning_message # Assumed globally available
+from utils.helpers import fragment
 from datetime import time # Added for _dtp_get_mock_patient_visits
-import copy # Added for _drtmpl_ functions
+import itertools # Added for _drtmpl_mock_store ids
+from collections import defaultdict # Added for _drpres_mock_data
 
 # Imports for Doctor's Templates Page
 from config.settings import TEMPLATE_CONFIG # Added
@@ -133,6 +154,18 @@ except ImportError:
 from config.settings import DRUG_CLASSES # Added (ensure it's not duplicated if already there for other roles)
 # MedicationCard, SearchFormComponent, MedicationQueries are likely already handled or mocked.
 
+# Dashboard figures change on a minutes timescale, so reruns within a minute reuse them; Refresh clears them
+@st.cache_data(ttl=60, show_spinner=False)
+def _drdash_fetch_prescription_metrics(doctor_id, days_back: int):
+    return get_analytics_service().get_dashboard_metrics(USER_ROLES['DOCTOR'], doctor_id, days_back=days_back)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _drdash_fetch_template_count(doctor_id):
+    templates = TemplateQueries.get_doctor_templates(doctor_id)
+    return len(templates) if templates is not None else 0
+
+_DRDASH_STATUS_LABELS = {'completed': "✅ Completed", 'pending': "⏳ Pending", 'scheduled': "⏳ Scheduled"}
+
 # Full-featured Doctor Dashboard (moved from pages/1_doctor_dashboard.py original spec)
 def render_doctor_dashboard_content_internal(current_user):
     st.subheader("Activity Overview")
@@ -148,23 +181,21 @@ def render_doctor_dashboard_content_internal(current_user):
         )
     with col2_refresh_btn:
         st.markdown("<div>&nbsp;</div>", unsafe_allow_html=True) # Vertical alignment
+        # The click already reruns the page; clearing the caches makes this pass refetch
         if st.button("Refresh Data", key="doctor_dash_refresh_v1"): # Unique key
-            st.rerun()
+            _drdash_fetch_prescription_metrics.clear(); _drdash_fetch_template_count.clear()
+            _dtp_fetch_today_visit_counts.clear(); _dtp_fetch_today_cards.clear()
 
     metrics_data = {}
     my_prescriptions_val = "N/A"
+    day_iso = datetime.now().date().isoformat()
     today_patients_val = "N/A"
     completed_consultations_val = "N/A"
     pending_consultations_val = "N/A"
     active_templates_val = "N/A"
 
     try:
-        analytics_service_instance = AnalyticsService() # Needs to be defined or imported
-        metrics_data = analytics_service_instance.get_dashboard_metrics(
-            USER_ROLES['DOCTOR'],
-            current_user['id'],
-            days_back=days_back_selection
-        )
+        metrics_data = _drdash_fetch_prescription_metrics(current_user['id'], days_back_selection)
         my_prescriptions_val = metrics_data.get('my_prescriptions', metrics_data.get('my_prescriptions_count',0)) # Check for common key variations
 
     except Exception as e:
@@ -172,20 +203,16 @@ def render_doctor_dashboard_content_internal(current_user):
         # metrics_data remains {}
 
     try:
-        today_summary_data = DashboardQueries.get_today_summary(doctor_id=current_user['id'])
-        if today_summary_data is None: today_summary_data = {}
-        today_patients_val = today_summary_data.get('todays_visits_doctor', today_summary_data.get('total_patients', 0))
-        completed_consultations_val = today_summary_data.get('completed_consultations_doctor', today_summary_data.get('completed_consultations', 0))
-        if isinstance(today_patients_val, int) and isinstance(completed_consultations_val, int):
-            pending_consultations_val = today_patients_val - completed_consultations_val
-        else:
-            pending_consultations_val = "N/A"
+        # Shares the per-status counts cache with the Today's Patients page
+        status_counts = _dtp_fetch_today_visit_counts(day_iso) or {}
+        completed_consultations_val = status_counts.get('Completed', 0)
+        pending_consultations_val = status_counts.get('Scheduled', 0)
+        today_patients_val = completed_consultations_val + pending_consultations_val
     except Exception as e:
         st.error(f"Error fetching today's summary: {e}")
 
     try:
-        active_templates_list = TemplateQueries.get_doctor_templates(current_user['id']) # Assuming this returns a list
-        active_templates_val = len(active_templates_list) if active_templates_list is not None else 0
+        active_templates_val = _drdash_fetch_template_count(current_user['id'])
     except AttributeError: # If TemplateQueries or method doesn't exist
         st.warning("TemplateQueries not available for active templates count.")
         active_templates_val = "N/A"
@@ -204,32 +231,22 @@ def render_doctor_dashboard_content_internal(current_user):
     m_cols[4].metric("Active Templates", active_templates_val)
 
     st.markdown("<hr/>", unsafe_allow_html=True)
-    st.subheader("Today's Appointments")
+    st.subheader("Today's Clinic Appointments")
     try:
-        today_visits_list = VisitQueries.get_doctor_today_visits(current_user['id'])
-        if not today_visits_list:
+        # Card data already carries the formatted name and time
+        today_cards = [card for card, _ in _dtp_fetch_today_cards(day_iso, None)]
+        if not today_cards:
             st.info("No appointments scheduled for today.")
         else:
-            for visit in today_visits_list:
-                patient_name = visit.get('patient_full_name', visit.get('patient_name', 'N/A'))
-                visit_time = visit.get('visit_time')
-                # format_time_display needs to be robust for various time formats (datetime.time, str)
-                visit_time_str = format_time_display(visit_time) if visit_time else 'N/A'
-                visit_type = visit.get('visit_type', 'Consultation')
-                visit_status = visit.get('status', visit.get('consultation_completed_status', 'Scheduled'))
-
-                cols_appt = st.columns([3,1,2,1])
-                cols_appt[0].markdown(f"**{patient_name}**")
-                cols_appt[1].markdown(f"🕒 {visit_time_str}")
-                cols_appt[2].markdown(f"📋 {visit_type}")
-                if str(visit_status).lower() == 'completed':
-                    cols_appt[3].success(f"✅ Completed")
-                elif str(visit_status).lower() in ['pending', 'scheduled']:
-                    cols_appt[3].warning(f"⏳ {str(visit_status).title()}")
-                else:
-                    cols_appt[3].info(f"{str(visit_status).title()}")
+            # One table element for the whole day instead of four column widgets per visit
+            st.dataframe(pd.DataFrame({
+                'Patient': [card['name'] for card in today_cards],
+                'Time': [card['next_appointment_time'] for card in today_cards],
+                'Type': [card['next_appointment_type'] or 'Consultation' for card in today_cards],
+                'Status': [_DRDASH_STATUS_LABELS.get(str(card['status']).lower(), str(card['status']).title()) for card in today_cards],
+            }), hide_index=True, use_container_width=True)
     except AttributeError:
-        st.warning("VisitQueries or get_doctor_today_visits method not found. Appointments cannot be displayed.")
+        st.warning("VisitQueries or get_today_visits method not found. Appointments cannot be displayed.")
     except Exception as e:
         st.error(f"Error fetching today's appointments: {e}")
         st.info("Today's appointments list will be shown here.")
@@ -251,6 +268,11 @@ def render_doctor_dashboard(user: dict):
 
 # --- Assistant Dashboard Start ---
 # Copied from pages/8_assistant_dashboard.py and adapted
+# Dashboard figures are cached briefly so widget interactions don't re-query them; Refresh clears them
+@st.cache_data(ttl=30, show_spinner=False)
+def _asst_fetch_summary(assistant_id, days_back: int):
+    return DashboardQueries.get_assistant_summary(assistant_id, days_back=days_back)
+
 # Helper function for Assistant Dashboard content
 def render_assistant_dashboard_content_internal(current_user: dict): # Renamed for consistency
     st.subheader("🗓️ Daily Overview & Quick Actions")
@@ -267,41 +289,23 @@ def render_assistant_dashboard_content_internal(current_user: dict): # Renamed f
     with col2_refresh:
         st.markdown("<div>&nbsp;</div>", unsafe_allow_html=True)
         if st.button("🔄 Refresh Data", key="asst_dash_refresh_v1", use_container_width=True):
-            st.rerun()
+            # The click already triggered this rerun; the figures below are refetched once the caches are cleared
+            _asst_fetch_summary.clear()
 
     st.markdown("---")
 
     st.markdown("<h4>Key Metrics</h4>", unsafe_allow_html=True)
 
-    patients_registered_by_me = "N/A"
-    visits_recorded_by_me = "N/A"
-    total_patients_managed = "N/A"
-    upcoming_appointments_today = "N/A"
-
-    try:
-        analytics_service = AnalyticsService() # Assumes AnalyticsService is imported and robust
-        assistant_metrics = analytics_service.get_dashboard_metrics(
-            USER_ROLES['ASSISTANT'], current_user['id'], days_back=days_back_filter
-        )
-        patients_registered_by_me = assistant_metrics.get('patients_registered_by_user', 0)
-        visits_recorded_by_me = assistant_metrics.get('visits_recorded_by_user', 0)
-    except Exception as e:
-        st.warning(f"Could not load some analytics: {e}")
-        # Fallback to direct queries if AnalyticsService fails or specific metrics are not there
-        try:
-            patients_registered_by_me = PatientQueries.count_patients_created_by(current_user['id'], days_back=days_back_filter)
-            visits_recorded_by_me = VisitQueries.count_visits_recorded_by(current_user['id'], days_back=days_back_filter)
-        except Exception as qe:
-            st.error(f"Error fetching activity data: {qe}")
-
-
+    # All four figures come from one aggregate query
     try:
-        total_patients_managed = PatientQueries.get_total_patients_managed_by(current_user['id'])
-        upcoming_appointments_today = VisitQueries.get_all_today_visits()
-    except AttributeError as ae: # Handles if a query class or method is missing
-        st.error(f"A required database query function is missing: {ae}. Some metrics cannot be displayed.")
+        summary = _asst_fetch_summary(current_user['id'], days_back_filter)
     except Exception as e:
         st.error(f"Error fetching summary metrics: {e}")
+        summary = {}
+    patients_registered_by_me = summary.get('patients_registered', "N/A")
+    visits_recorded_by_me = summary.get('visits_recorded', "N/A")
+    total_patients_managed = summary.get('total_patients', "N/A")
+    upcoming_appointments_today = summary.get('upcoming_visits_today', "N/A")
 
     m_cols = st.columns(4)
     # Using st.metric as MetricCard might not be available or might have different signature
@@ -566,9 +570,6 @@ def run_app(): # Renamed main to run_app
     else:
         show_login_page() # Calls the local version
 
-if __name__ == "__main__":
-    run_app() # Or main()
-
 # --- Super Admin Dashboard Start ---
 # Copied from pages/14_super_admin_dashboard.py and adapted
 
@@ -585,7 +586,7 @@ def _sa_render_overview_tab(days_filter): # Renamed with _sa_ prefix
         if st.button("🔄 Refresh", use_container_width=True, key="sa_overview_refresh_v1"):
             st.rerun()
 
-    analytics_service = AnalyticsService() # Assumes this is available
+    analytics_service = get_analytics_service()
     # The SA dashboard used a specific get_dashboard_metrics, if that's different from doctor/assistant,
     # AnalyticsService needs to handle it or we use more specific queries.
     # For now, assuming get_dashboard_metrics can take SUPER_ADMIN role.
@@ -705,7 +706,7 @@ def _sa_render_patients_tab(): # Renamed
 def _sa_render_prescriptions_tab(): # Renamed
     st.subheader("📝 Prescription Overview")
     try:
-        analytics_service = AnalyticsService()
+        analytics_service = get_analytics_service()
         # Assuming this method is adapted or exists in the actual/mock service for SA role
         prescription_analytics = analytics_service.get_prescription_analytics(USER_ROLES['SUPER_ADMIN'], days_back=30)
         if not prescription_analytics: st.warning("No prescription analytics data."); return
@@ -727,7 +728,7 @@ def _sa_render_prescriptions_tab(): # Renamed
 def _sa_render_system_tab(): # Renamed
     st.subheader("⚙️ System Monitoring")
     try:
-        analytics_service = AnalyticsService()
+        analytics_service = get_analytics_service()
         system_metrics = analytics_service.get_system_performance_metrics()
         if not system_metrics: st.warning("Unable to load system metrics."); return
 
@@ -791,42 +792,70 @@ def render_super_admin_dashboard(user: dict):
 # --- Doctor's Prescriptions Page Start ---
 # Copied from pages/3_doctor_prescriptions.py and adapted
 
-def _drpres_get_mock_patients(query: str): # Prefixed
-    if not query: return []
-    return [
+@st.cache_resource
+def _drpres_mock_data():
+    """Mock patients, medications, lab tests and prescriptions, built on first use and shared across reruns."""
+    patients = [
         {'id': 'p001', 'first_name': 'John', 'last_name': 'Doe', 'dob': '1985-01-15', 'gender': 'Male', 'allergies': ['Peanuts'], 'conditions': ['Hypertension']},
         {'id': 'p002', 'first_name': 'Jane', 'last_name': 'Smith', 'dob': '1992-07-22', 'gender': 'Female', 'allergies': [], 'conditions': ['Asthma', 'Migraine']},
     ]
+    prescriptions = [
+        {'prescription_id': 'rx001', 'patient_name': 'John Doe', 'patient_id': 'p001', 'date_issued': '2023-10-01', 'status': 'Active', 'doctor_id': 'docRxMaster', 'medications': [{'name': 'Amoxicillin 250mg'}], 'lab_tests': []},
+        {'prescription_id': 'rx002', 'patient_name': 'Jane Smith', 'patient_id': 'p002', 'date_issued': '2023-09-15', 'status': 'Expired', 'doctor_id': 'docRxMaster', 'medications': [], 'lab_tests': [{'name': 'Lipid Panel'}]},
+    ]
+    # doctor_id -> [(lowercased "patient name\0rx id", rx), ...], so a search touches one doctor's rows only
+    rx_by_doctor = defaultdict(list)
+    for rx in prescriptions:
+        rx_by_doctor[rx['doctor_id']].append((f"{rx['patient_name']}\0{rx['prescription_id']}".lower(), rx))
+    return {
+        'patients': patients,
+        'patients_by_id': {p['id']: p for p in patients},
+        'medications': [
+            {'id': 'med001', 'name': 'Amoxicillin 250mg', 'category': 'Antibiotic'},
+            {'id': 'med002', 'name': 'Paracetamol 500mg', 'category': 'Analgesic'},
+            {'id': 'med003', 'name': 'Lisinopril 10mg', 'category': 'Antihypertensive'},
+        ],
+        'lab_tests': [
+            {'id': 'lab001', 'name': 'Complete Blood Count (CBC)', 'category': 'Hematology'},
+            {'id': 'lab002', 'name': 'Lipid Panel', 'category': 'Chemistry'},
+            {'id': 'lab003', 'name': 'Urinalysis', 'category': 'Microbiology'},
+        ],
+        'rx_by_doctor': dict(rx_by_doctor),
+    }
+
+def _drpres_get_mock_patients(query: str): # Prefixed
+    if not query: return []
+    return _drpres_mock_data()['patients']
 
 def _drpres_get_mock_medications(query: str = ""): # Prefixed
-    meds = [
-        {'id': 'med001', 'name': 'Amoxicillin 250mg', 'category': 'Antibiotic'},
-        {'id': 'med002', 'name': 'Paracetamol 500mg', 'category': 'Analgesic'},
-        {'id': 'med003', 'name': 'Lisinopril 10mg', 'category': 'Antihypertensive'},
-    ]
-    if query:
-        return [m for m in meds if query.lower() in m['name'].lower()]
-    return meds
+    meds = _drpres_mock_data()['medications']
+    if not query: return meds
+    query_lower = query.lower()
+    return [m for m in meds if query_lower in m['name'].lower()]
 
 def _drpres_get_mock_lab_tests(query: str = ""): # Prefixed
-    tests = [
-        {'id': 'lab001', 'name': 'Complete Blood Count (CBC)', 'category': 'Hematology'},
-        {'id': 'lab002', 'name': 'Lipid Panel', 'category': 'Chemistry'},
-        {'id': 'lab003', 'name': 'Urinalysis', 'category': 'Microbiology'},
-    ]
-    if query:
-        return [t for t in tests if query.lower() in t['name'].lower()]
-    return tests
-
-def _drpres_get_mock_prescriptions(query: str, doctor_id: str): # Prefixed
-    all_prescriptions = [
-        {'prescription_id': 'rx001', 'patient_name': 'John Doe', 'patient_id': 'p001', 'date_issued': '2023-10-01', 'status': 'Active', 'doctor_id': 'docRxMaster', 'medications': [{'name': 'Amoxicillin 250mg'}], 'lab_tests': []},
-        {'prescription_id': 'rx002', 'patient_name': 'Jane Smith', 'patient_id': 'p002', 'date_issued': '2023-09-15', 'status': 'Expired', 'doctor_id': 'docRxMaster', 'medications': [], 'lab_tests': [{'name': 'Lipid Panel'}]},
-    ]
-    doctor_prescriptions = [rx for rx in all_prescriptions if rx['doctor_id'] == doctor_id]
-    if not query: return doctor_prescriptions
+    tests = _drpres_mock_data()['lab_tests']
+    if not query: return tests
     query_lower = query.lower()
-    return [rx for rx in doctor_prescriptions if query_lower in rx['patient_name'].lower() or query_lower in rx['prescription_id'].lower()]
+    return [t for t in tests if query_lower in t['name'].lower()]
+
+def _drpres_get_mock_prescriptions(query: str, doctor_id: str, limit: int = 100, offset: int = 0): # Prefixed
+    rows = _drpres_mock_data()['rx_by_doctor'].get(doctor_id, ())
+    query_lower = query.lower() if query else ""
+    return [rx for search_key, rx in rows if query_lower in search_key][offset:offset + limit]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _drpres_fetch_patient(patient_id):
+    """Patient record for the selected search result, cached per patient id."""
+    return PatientQueries.get_patient_by_id(patient_id)
+
+def _drpres_ai_available() -> bool:
+    """Imports the AI service on first use; is_ai_available itself is cached per process."""
+    try:
+        from services.ai_service import is_ai_available
+    except ImportError:
+        return False # Default to false if service not there
+    return is_ai_available()
 
 def _drpres_handle_ai_analysis(medications, patient_context): # Prefixed
     st.toast("🔬 AI Analysis triggered (placeholder). This may take a moment.")
@@ -836,11 +865,14 @@ def _drpres_handle_save_prescription(prescription_data, medications, lab_tests,
     # format_patient_name is globally available
     patient_name = format_patient_name(st.session_state.selected_patient_for_rx.get('first_name','N/A'), st.session_state.selected_patient_for_rx.get('last_name',''))
     try:
-        PrescriptionQueries.create_prescription(
-            patient_id=st.session_state.selected_patient_for_rx['id'], doctor_id=doctor['id'],
-            diagnosis=prescription_data['diagnosis'], chief_complaint=prescription_data['chief_complaint'],
-            notes=prescription_data['general_notes'], medications=medications, lab_tests=lab_tests
+        new_prescription_id = PrescriptionQueries.create_prescription(
+            {'patient_id': st.session_state.selected_patient_for_rx['id'], 'diagnosis': prescription_data['diagnosis'],
+             'chief_complaint': prescription_data['chief_complaint'], 'notes': prescription_data['general_notes']},
+            doctor['id'], medications=medications, lab_tests=lab_tests
         )
+        if not new_prescription_id:
+            show_error_message(f"Failed to save prescription for {patient_name}.")
+            return False
         show_success_message(f"Prescription for {patient_name} saved successfully!")
         st.session_state.rx_medications = []; st.session_state.rx_lab_tests = []
         return True
@@ -856,6 +888,14 @@ def _drpres_handle_prescription_action(action: str, rx_data: dict): # Prefixed
     st.toast(f"{action} for Prescription ID: {rx_data.get('prescription_id', 'N/A')} (placeholder).")
     if action == "View PDF": st.info("PDF generation placeholder.")
 
+_DRPRES_RX_PAGE_SIZE = 20
+
+def _drpres_set_rx_page(page: int):
+    st.session_state.drpres_rx_page = page
+
+_DRPRES_RX_ACTIONS = ("View PDF", "Edit")
+
+@fragment
 def _drpres_render_create_prescription_tab(doctor: dict): # Prefixed
     st.subheader("⚕️ Create New Prescription")
     st.markdown("#### 1. Select Patient")
@@ -869,7 +909,7 @@ def _drpres_render_create_prescription_tab(doctor: dict): # Prefixed
 
     if selected_patient_id and (not st.session_state.get('selected_patient_for_rx') or st.session_state.selected_patient_for_rx['id'] != selected_patient_id) :
         try:
-            patient_data = PatientQueries.get_patient_details(selected_patient_id) if patient_search_fn != _drpres_get_mock_patients else next((p for p in _drpres_get_mock_patients("any") if p['id'] == selected_patient_id), None)
+            patient_data = _drpres_fetch_patient(selected_patient_id) if patient_search_fn != _drpres_get_mock_patients else _drpres_mock_data()['patients_by_id'].get(selected_patient_id)
             if patient_data: st.session_state.selected_patient_for_rx = patient_data; st.session_state.rx_medications = []; st.session_state.rx_lab_tests = []
             else: show_error_message("Patient not found."); st.session_state.selected_patient_for_rx = None
         except Exception as e: show_error_message(f"Error fetching patient: {e}"); st.session_state.selected_patient_for_rx = None
@@ -886,13 +926,13 @@ def _drpres_render_create_prescription_tab(doctor: dict): # Prefixed
             chief_complaint = st.text_input("Chief Complaint", key="drpres_rx_chief")
             diagnosis = st.text_area("Diagnosis", key="drpres_rx_diag")
 
-            try: available_meds = MedicationQueries.search_medications("")
+            try: available_meds = get_all_medications()
             except AttributeError: available_meds = _drpres_get_mock_medications(); st.warning("Medication search mock active.")
             # PrescriptionMedicationComponent is globally available or mocked
             med_component = PrescriptionMedicationComponent(st.session_state.get('rx_medications', []), available_meds, "drpres_rx_med")
             st.session_state.rx_medications = med_component.render()
 
-            try: available_tests = LabTestQueries.search_lab_tests("")
+            try: available_tests = get_all_lab_tests()
             except AttributeError: available_tests = _drpres_get_mock_lab_tests(); st.warning("Lab test search mock active.")
             # PrescriptionLabTestComponent is globally available or mocked
             test_component = PrescriptionLabTestComponent(st.session_state.get('rx_lab_tests', []), available_tests, "drpres_rx_lab")
@@ -900,7 +940,7 @@ def _drpres_render_create_prescription_tab(doctor: dict): # Prefixed
 
             general_notes = st.text_area("General Notes", key="drpres_rx_notes")
 
-            if is_ai_available() and st.form_submit_button("🔬 Analyze with AI (Beta)", use_container_width=False):
+            if _drpres_ai_available() and st.form_submit_button("🔬 Analyze with AI (Beta)", use_container_width=False):
                  _drpres_handle_ai_analysis(st.session_state.rx_medications, patient)
 
             if st.form_submit_button("💾 Save Prescription", use_container_width=True):
@@ -911,23 +951,39 @@ def _drpres_render_create_prescription_tab(doctor: dict): # Prefixed
                     if _drpres_handle_save_prescription(rx_data, st.session_state.rx_medications, st.session_state.rx_lab_tests, doctor): st.rerun()
     else: st.info("Select a patient to create a prescription.")
 
+@fragment
 def _drpres_render_view_prescriptions_tab(doctor: dict): # Prefixed
     st.subheader("📋 View Existing Prescriptions")
-    try: prescription_search_fn = lambda query: PrescriptionQueries.search_prescriptions(query, doctor_id=doctor['id'])
-    except AttributeError: prescription_search_fn = lambda query: _drpres_get_mock_prescriptions(query, doctor['id']); st.warning("Prescription search mock active.")
-
-    search_query_rx = st.text_input("Search by Patient Name, Rx ID...", key="drpres_rx_search_input")
-    if st.button("Search Prescriptions", key="drpres_rx_search_btn") or search_query_rx:
-        try: prescriptions = prescription_search_fn(search_query_rx)
+    try: prescription_search_fn = lambda query, limit, offset: PrescriptionQueries.search_prescriptions(query, doctor_id=doctor['id'], limit=limit, offset=offset)
+    except AttributeError: prescription_search_fn = lambda query, limit, offset: _drpres_get_mock_prescriptions(query, doctor['id'], limit, offset); st.warning("Prescription search mock active.")
+
+    # Inside a form, typing doesn't rerun the script; the search only runs on submit
+    with st.form("drpres_rx_search_form"):
+        search_input_rx = st.text_input("Search by Patient Name, Rx ID...", key="drpres_rx_search_input")
+        search_submitted = st.form_submit_button("Search Prescriptions")
+    if search_submitted:
+        # A new search starts again from the first page
+        st.session_state.drpres_rx_query = search_input_rx; st.session_state.drpres_rx_page = 0
+
+    search_query_rx = st.session_state.get('drpres_rx_query')
+    if search_query_rx is not None:
+        page = st.session_state.setdefault('drpres_rx_page', 0)
+        start = page * _DRPRES_RX_PAGE_SIZE
+        # One row past the page tells us whether there is a next page without counting the full result set
+        try: prescriptions = prescription_search_fn(search_query_rx, _DRPRES_RX_PAGE_SIZE + 1, start)
         except Exception as e: show_error_message(f"Error searching: {e}"); prescriptions = []
-        if not prescriptions: st.info(f"No prescriptions found for '{search_query_rx}'.")
+        if not prescriptions and page == 0: st.info(f"No prescriptions found for '{search_query_rx}'.")
         else:
-            st.write(f"Found {len(prescriptions)} prescription(s):")
-            for idx, rx in enumerate(prescriptions):
-                actions = {"View PDF": lambda r=rx: _drpres_handle_prescription_action("View PDF", r), "Edit": lambda r=rx: _drpres_handle_prescription_action("Edit", r)}
-                # PrescriptionCard is globally available or mocked
-                try: PrescriptionCard(prescription_data=rx, actions=actions, key=f"drpres_rx_card_{rx.get('prescription_id', idx)}")
-                except Exception as e: st.error(f"Error rendering card: {e}")
+            has_next_page = len(prescriptions) > _DRPRES_RX_PAGE_SIZE
+            prescriptions = prescriptions[:_DRPRES_RX_PAGE_SIZE]
+            st.write(f"Showing prescription(s) {start + 1}-{start + len(prescriptions)}:" if prescriptions else "No more prescriptions.")
+            for idx, rx in enumerate(prescriptions, start=start):
+                actions = _card_actions(_drpres_handle_prescription_action, _DRPRES_RX_ACTIONS, rx)
+                _render_card_component(PrescriptionCard, _PRESCRIPTION_CARD_PARAMS, 'prescription_data', rx, actions, f"drpres_rx_card_{rx.get('prescription_id', idx)}")
+            prev_col, next_col = st.columns(2)
+            # on_click runs before the fragment reruns, so no explicit st.rerun() is needed
+            prev_col.button("⬅️ Prev", key="drpres_rx_prev_btn", disabled=page == 0, on_click=_drpres_set_rx_page, args=(page - 1,))
+            next_col.button("Next ➡️", key="drpres_rx_next_btn", disabled=not has_next_page, on_click=_drpres_set_rx_page, args=(page + 1,))
     else: st.info("Enter search terms to find prescriptions.")
 
 def render_doctor_prescriptions(user: dict): # Renamed from show_prescriptions_page
@@ -950,29 +1006,34 @@ def render_doctor_prescriptions(user: dict): # Renamed from show_prescriptions_p
 # Copied from pages/2_doctor_todays_patients.py and adapted
 
 # Mock data if queries or components are not ready (specific to this page's needs)
-def _dtp_get_mock_patient_visits(doctor_id: str):
-    """Returns a list of mock patient visit data for the given doctor ID."""
-    current_date = datetime.now().date()
-    return [
+@st.cache_resource
+def _dtp_mock_visits():
+    """Mock visit rows without the per-call doctor_id/visit_date, built on first use and shared across reruns."""
+    return (
         {
-            'visit_id': 'v001', 'patient_id': 'p001', 'doctor_id': doctor_id,
+            'visit_id': 'v001', 'patient_id': 'p001',
             'patient_first_name': 'John', 'patient_last_name': 'Doe', 'patient_dob': '1985-01-15', 'patient_gender': 'Male',
-            'visit_time': time(9, 0), 'visit_date': current_date, 'visit_type': 'Follow-up', 'status': 'Scheduled',
+            'visit_time': time(9, 0), 'visit_type': 'Follow-up', 'status': 'Scheduled',
             'notes': 'Routine check-up.'
         },
         {
-            'visit_id': 'v002', 'patient_id': 'p002', 'doctor_id': doctor_id,
+            'visit_id': 'v002', 'patient_id': 'p002',
             'patient_first_name': 'Jane', 'patient_last_name': 'Smith', 'patient_dob': '1992-07-22', 'patient_gender': 'Female',
-            'visit_time': time(10, 30), 'visit_date': current_date, 'visit_type': 'New Consultation', 'status': 'Scheduled',
+            'visit_time': time(10, 30), 'visit_type': 'New Consultation', 'status': 'Scheduled',
             'notes': 'Initial consultation for ongoing symptoms.'
         },
         {
-            'visit_id': 'v003', 'patient_id': 'p003', 'doctor_id': doctor_id,
+            'visit_id': 'v003', 'patient_id': 'p003',
             'patient_first_name': 'Alice', 'patient_last_name': 'Wonder', 'patient_dob': '1978-11-05', 'patient_gender': 'Female',
-            'visit_time': time(11, 15), 'visit_date': current_date, 'visit_type': 'Check-up', 'status': 'Completed',
+            'visit_time': time(11, 15), 'visit_type': 'Check-up', 'status': 'Completed',
             'notes': 'Post-op check.'
         },
-    ]
+    )
+
+def _dtp_get_mock_patient_visits(doctor_id: str):
+    """Returns a list of mock patient visit data for the given doctor ID."""
+    current_date = datetime.now().date()
+    return [{**v, 'doctor_id': doctor_id, 'visit_date': current_date} for v in _dtp_mock_visits()]
 
 def _dtp_handle_patient_action(action_type: str, patient_visit_data: dict):
     """Placeholder function to handle actions from PatientCard."""
@@ -984,72 +1045,89 @@ def _dtp_handle_patient_action(action_type: str, patient_visit_data: dict):
     elif action_type == "Start Consultation":
         st.session_state.active_consultation = patient_visit_data
 
+def _dtp_preformat_visits(visits: list, status: str) -> list:
+    """Pairs each visit with its ready-to-render PatientCard data, formatting names and times once."""
+    # Upcoming cards describe the next appointment, completed ones the last
+    prefix = 'last' if status == 'Completed' else 'next'
+    return [({
+        'name': format_patient_name(v.get('patient_first_name'), v.get('patient_last_name')),
+        'id': v.get('patient_id'), 'dob': v.get('patient_dob'), 'gender': v.get('patient_gender'),
+        f'{prefix}_appointment_time': format_time_display(v['visit_time']) if v.get('visit_time') else "N/A",
+        f'{prefix}_appointment_type': v.get('visit_type'), 'status': v.get('status') or status,
+    }, v) for v in visits]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _dtp_fetch_today_cards(day_iso: str, status: str):
+    """Today's visits with one status as (card_data, visit) pairs; day_iso is part of the cache key so entries roll over at midnight."""
+    return _dtp_preformat_visits(VisitQueries.get_today_visits(status=status) or [], status)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _dtp_fetch_today_visit_counts(day_iso: str):
+    """Per-status counts of today's visits, so sections can be sized without loading their rows."""
+    return VisitQueries.get_today_visit_counts()
+
+def _dtp_bucket_visits_by_status(visits: list) -> dict:
+    """Groups visits into 'Scheduled', 'Completed' and 'Other' in a single pass."""
+    buckets = {'Scheduled': [], 'Completed': [], 'Other': []}
+    for v in visits:
+        status = (v.get('status') or 'Scheduled').lower()
+        buckets['Scheduled' if status == 'scheduled' else 'Completed' if status == 'completed' else 'Other'].append(v)
+    return buckets
+
+# Card actions per section; _dtp_handle_patient_action dispatches on the action name
+_DTP_UPCOMING_ACTIONS = ("View Details", "Start Consultation")
+_DTP_COMPLETED_ACTIONS = ("View Summary",)
+
+@fragment
 def _dtp_render_todays_patients_list(doctor: dict): # Renamed from render_todays_patients_list
     """Renders the list of today's patients for the given doctor."""
     st.markdown("---")
     if st.button("🔄 Refresh List", key="dtp_refresh_button"): # Added key
-        st.rerun()
+        # The click already reran this fragment; clearing before the fetch below is enough
+        _dtp_fetch_today_cards.clear(); _dtp_fetch_today_visit_counts.clear()
 
-    patient_visits = []
+    # Only per-status counts are loaded up front; each section loads its own rows when it is shown
+    day_iso = datetime.now().date().isoformat()
     try:
-        patient_visits = VisitQueries.get_doctor_today_visits(doctor['id'])
-        if patient_visits is None: patient_visits = []
+        status_counts = _dtp_fetch_today_visit_counts(day_iso) or {}
+        load_visits = lambda status: _dtp_fetch_today_cards(day_iso, status)
     except AttributeError:
-        st.warning("Patient data system (VisitQueries.get_doctor_today_visits) is initializing. Using mock data.")
-        patient_visits = _dtp_get_mock_patient_visits(doctor['id'])
+        st.warning("Patient data system (VisitQueries.get_today_visits) is initializing. Using mock data.")
+        mock_buckets = _dtp_bucket_visits_by_status(_dtp_get_mock_patient_visits(doctor['id']))
+        status_counts = {status: len(rows) for status, rows in mock_buckets.items() if rows}
+        load_visits = lambda status: _dtp_preformat_visits(mock_buckets[status], status)
     except Exception as e:
         st.error(f"An error occurred while fetching patient data: {e}")
-        patient_visits = []
+        status_counts = {}
 
-    if not patient_visits:
+    if not any(status_counts.values()):
         st.info("No patients scheduled for today.")
         return
 
-    upcoming_visits = [v for v in patient_visits if v.get('status', 'Scheduled').lower() == 'scheduled']
-    completed_visits = [v for v in patient_visits if v.get('status', 'Scheduled').lower() == 'completed']
-    other_visits = [v for v in patient_visits if v.get('status', 'Scheduled').lower() not in ['scheduled', 'completed']]
+    upcoming_visits = load_visits('Scheduled') if status_counts.get('Scheduled') else []
+    completed_count = status_counts.get('Completed', 0)
+    other_visits = load_visits('Other') if status_counts.get('Other') else []
 
     if upcoming_visits:
         st.subheader("Upcoming Appointments")
-        for visit_data in upcoming_visits:
-            patient_name = format_patient_name(visit_data.get('patient_first_name'), visit_data.get('patient_last_name'))
-            # format_time_display is assumed to be imported globally
-            visit_time_formatted = format_time_display(visit_data.get('visit_time')) if visit_data.get('visit_time') else "N/A"
-
-            actions = {
-                "View Details": lambda v=visit_data: _dtp_handle_patient_action("View Details", v),
-                "Start Consultation": lambda v=visit_data: _dtp_handle_patient_action("Start Consultation", v)
-            }
-            card_data = {
-                'name': patient_name, 'id': visit_data.get('patient_id'), 'dob': visit_data.get('patient_dob'),
-                'gender': visit_data.get('patient_gender'), 'next_appointment_time': visit_time_formatted,
-                'next_appointment_type': visit_data.get('visit_type'), 'status': visit_data.get('status', 'Scheduled'),
-            }
-            try:
-                # PatientCard is assumed to be imported globally or mocked
-                PatientCard(patient_data=card_data, actions=actions, key=f"dtp_patient_card_{visit_data.get('visit_id')}")
-            except Exception as e: st.error(f"Could not display patient card for {patient_name}: {e}")
+        upcoming_grid = st.container(border=True)
+        grid_cols = upcoming_grid.columns(3)
+        for i, (card_data, visit_data) in enumerate(upcoming_visits):
+            with grid_cols[i % 3]:
+                _render_card_component(PatientCard, _PATIENT_CARD_PARAMS, 'patient_data', card_data, _card_actions(_dtp_handle_patient_action, _DTP_UPCOMING_ACTIONS, visit_data), f"dtp_patient_card_{visit_data.get('visit_id')}")
         st.markdown("---")
 
-    if completed_visits:
-        st.subheader("Completed Consultations Today")
-        for visit_data in completed_visits:
-            patient_name = format_patient_name(visit_data.get('patient_first_name'), visit_data.get('patient_last_name'))
-            visit_time_formatted = format_time_display(visit_data.get('visit_time')) if visit_data.get('visit_time') else "N/A"
-            actions = {"View Summary": lambda v=visit_data: _dtp_handle_patient_action("View Summary", v)}
-            card_data = {
-                'name': patient_name, 'id': visit_data.get('patient_id'), 'dob': visit_data.get('patient_dob'),
-                'gender': visit_data.get('patient_gender'), 'last_appointment_time': visit_time_formatted,
-                'last_appointment_type': visit_data.get('visit_type'), 'status': visit_data.get('status', 'Completed'),
-            }
-            try:
-                PatientCard(patient_data=card_data, actions=actions, key=f"dtp_completed_card_{visit_data.get('visit_id')}")
-            except Exception as e: st.error(f"Could not display patient card for {patient_name}: {e}")
+    # Completed visits are only queried once the doctor asks to see them
+    if completed_count and st.toggle(f"Show Completed Consultations Today ({completed_count})", key="dtp_show_completed"):
+        completed_section = st.container()
+        for card_data, visit_data in load_visits('Completed'):
+            with completed_section:
+                _render_card_component(PatientCard, _PATIENT_CARD_PARAMS, 'patient_data', card_data, _card_actions(_dtp_handle_patient_action, _DTP_COMPLETED_ACTIONS, visit_data), f"dtp_completed_card_{visit_data.get('visit_id')}")
         st.markdown("---")
 
     if other_visits:
         st.subheader("Other Status")
-        for visit_data in other_visits: st.write(visit_data)
+        for _, visit_data in other_visits: st.write(visit_data)
 
 
 def render_doctor_todays_patients(user: dict): # Renamed from show_todays_patients_page
@@ -1060,7 +1138,7 @@ def render_doctor_todays_patients(user: dict): # Renamed from show_todays_patien
 
     # user object is passed, no need to call get_current_user() again
     if user:
-        st.info(f"Displaying today's patient list for Dr. {user.get('full_name', 'N/A')}.")
+        st.info("Displaying today's patient list for the whole clinic; visits are not assigned to individual doctors.")
         _dtp_render_todays_patients_list(user) # Call prefixed helper
     else:
         st.error("Could not retrieve doctor information. Please log in again.")
@@ -1069,48 +1147,69 @@ def render_doctor_todays_patients(user: dict): # Renamed from show_todays_patien
 # --- Doctor's Templates Page Start ---
 # Copied from pages/4_doctor_templates.py and adapted
 
-_DRTMPL_MOCK_TEMPLATES_DB = []
-
-def _drtmpl_initialize_mock_db(): # Prefixed
-    global _DRTMPL_MOCK_TEMPLATES_DB # Use prefixed global
-    if not _DRTMPL_MOCK_TEMPLATES_DB:
-        _drtmpl_mock_create_template({"name": "Flu Follow-up", "category": "Follow-up", "diagnosis": "Influenza", "instructions": "Rest.", "medications": [], "lab_tests": []}, 'docTemplateUser', is_initial_setup=True)
-        _drtmpl_mock_create_template({"name": "Routine Physical", "category": "General", "diagnosis": "Health Maintenance", "instructions": "Yearly check.", "medications": [], "lab_tests": []}, 'docTemplateUser', is_initial_setup=True)
+@st.cache_resource
+def _drtmpl_category_options(): # Prefixed
+    """Category selectbox options and a value -> position map, built on first use and shared across reruns."""
+    options = tuple(TEMPLATE_CONFIG.get('CATEGORIES', ["General", "Follow-up"]))
+    return options, {c: i for i, c in enumerate(options)}
+
+def _drtmpl_copy_template_data(data): # Prefixed
+    # Only the row lists are mutable; copy those row by row and share the (immutable) scalar values
+    copied = dict(data)
+    for field in ('medications', 'lab_tests'):
+        if isinstance(copied.get(field), list): copied[field] = [dict(row) for row in copied[field]]
+    return copied
+
+def _drtmpl_mock_insert(store, data, doctor_id): # Prefixed
+    new_id = f"tmpl_app_{next(store['ids'])}"
+    new_template = {'id': new_id, 'doctor_id': doctor_id, **_drtmpl_copy_template_data(data), 'created_at': datetime.now().isoformat(), 'updated_at': datetime.now().isoformat()}
+    store['by_id'][new_id] = store['by_doctor'][doctor_id][new_id] = new_template
+    return new_template
 
+# app.py re-executes on every rerun, so the mock store lives in a resource cache: built and seeded once per process
+@st.cache_resource
+def _drtmpl_mock_store(): # Prefixed
+    store = {
+        'by_id': {}, # Both maps keep insertion order
+        'by_doctor': defaultdict(dict), # doctor_id -> {template_id: template}
+        'ids': itertools.count(1), # Monotonic, so ids are never reused after a delete
+    }
+    _drtmpl_mock_insert(store, {"name": "Flu Follow-up", "category": "Follow-up", "diagnosis": "Influenza", "instructions": "Rest.", "medications": [], "lab_tests": []}, 'docTemplateUser')
+    _drtmpl_mock_insert(store, {"name": "Routine Physical", "category": "General", "diagnosis": "Health Maintenance", "instructions": "Yearly check.", "medications": [], "lab_tests": []}, 'docTemplateUser')
+    return store
+
+# Reads hand out the stored dicts; the writers below and the edit action copy the row lists
 def _drtmpl_get_mock_doctor_templates(doctor_id: str): # Prefixed
-    return [copy.deepcopy(t) for t in _DRTMPL_MOCK_TEMPLATES_DB if t['doctor_id'] == doctor_id]
+    return list(_drtmpl_mock_store()['by_doctor'].get(doctor_id, {}).values())
 
 def _drtmpl_get_mock_template_by_id(template_id: str, doctor_id: str): # Prefixed
-    for t in _DRTMPL_MOCK_TEMPLATES_DB:
-        if t['id'] == template_id and t['doctor_id'] == doctor_id: return copy.deepcopy(t)
-    return None
-
-def _drtmpl_mock_create_template(data, doctor_id, is_initial_setup=False): # Prefixed
-    global _DRTMPL_MOCK_TEMPLATES_DB
-    new_id = f"tmpl_app_{len(_DRTMPL_MOCK_TEMPLATES_DB) + 1}"
-    new_template = {'id': new_id, 'doctor_id': doctor_id, **data, 'created_at': datetime.now().isoformat(), 'updated_at': datetime.now().isoformat()}
-    _DRTMPL_MOCK_TEMPLATES_DB.append(new_template)
-    if not is_initial_setup: show_success_message(f"Mock Template '{new_template['name']}' created.")
+    return _drtmpl_mock_store()['by_doctor'].get(doctor_id, {}).get(template_id)
+
+def _drtmpl_mock_create_template(data, doctor_id): # Prefixed
+    new_template = _drtmpl_mock_insert(_drtmpl_mock_store(), data, doctor_id)
+    show_success_message(f"Mock Template '{new_template['name']}' created.")
     return new_template
 
 def _drtmpl_mock_update_template(template_id, data, doctor_id): # Prefixed
-    global _DRTMPL_MOCK_TEMPLATES_DB
-    for i, t in enumerate(_DRTMPL_MOCK_TEMPLATES_DB):
-        if t['id'] == template_id and t['doctor_id'] == doctor_id:
-            _DRTMPL_MOCK_TEMPLATES_DB[i] = {**t, **data, 'updated_at': datetime.now().isoformat()}; return _DRTMPL_MOCK_TEMPLATES_DB[i]
-    return None
+    store = _drtmpl_mock_store()
+    doctor_templates = store['by_doctor'].get(doctor_id, {})
+    t = doctor_templates.get(template_id)
+    if not t: return None
+    updated = {**t, **_drtmpl_copy_template_data(data), 'updated_at': datetime.now().isoformat()}
+    store['by_id'][template_id] = doctor_templates[template_id] = updated
+    return updated
 
 def _drtmpl_mock_delete_template(template_id, doctor_id): # Prefixed
-    global _DRTMPL_MOCK_TEMPLATES_DB
-    original_len = len(_DRTMPL_MOCK_TEMPLATES_DB)
-    _DRTMPL_MOCK_TEMPLATES_DB = [t for t in _DRTMPL_MOCK_TEMPLATES_DB if not (t['id'] == template_id and t['doctor_id'] == doctor_id)]
-    return len(_DRTMPL_MOCK_TEMPLATES_DB) < original_len
+    store = _drtmpl_mock_store()
+    if store['by_doctor'].get(doctor_id, {}).pop(template_id, None) is None: return False
+    del store['by_id'][template_id]
+    return True
 
 def _drtmpl_handle_save_template(data, doctor_id): # Prefixed
     try: template = TemplateService.create_template(data, doctor_id)
     except AttributeError: template = _drtmpl_mock_create_template(data, doctor_id); show_warning_message("Template service mock active.")
     except Exception as e: show_error_message(f"Error: {e}"); return
-    if template: show_success_message(f"Template '{template['name']}' created."); st.session_state.drtmpl_editing_template_id = None; st.session_state.drtmpl_template_form_data = {}; st.rerun()
+    if template: _drdash_fetch_template_count.clear(); show_success_message(f"Template '{template['name']}' created."); st.session_state.drtmpl_editing_template_id = None; st.session_state.drtmpl_template_form_data = {}; st.rerun()
     else: show_error_message("Failed to create template.")
 
 def _drtmpl_handle_update_template(template_id, data, doctor_id): # Prefixed
@@ -1127,7 +1226,7 @@ def _drtmpl_handle_delete_template(template_id, doctor_id): # Prefixed
         except AttributeError: success = _drtmpl_mock_delete_template(template_id, doctor_id); show_warning_message("Template service mock active.")
         except Exception as e: show_error_message(f"Error: {e}"); success = False
         del st.session_state[confirm_key]
-        if success: show_success_message(f"Template ID {template_id} deleted."); st.rerun()
+        if success: _drdash_fetch_template_count.clear(); show_success_message(f"Template ID {template_id} deleted."); st.rerun()
         else: show_error_message("Failed to delete template.")
     else: st.session_state[confirm_key] = True; show_warning_message(f"Confirm delete template ID {template_id}?"); st.rerun()
 
@@ -1138,11 +1237,12 @@ def _drtmpl_process_duplication(original_template_id, new_name, doctor_id): # Pr
     try:
         original_template = TemplateQueries.get_template_details(original_template_id, doctor_id) if DB_QUERIES_AVAILABLE else _drtmpl_get_mock_template_by_id(original_template_id, doctor_id)
         if not original_template: show_error_message("Original template not found."); return
-        duplicated_data = {k: v for k, v in original_template.items() if k not in ['id', 'created_at', 'updated_at', 'doctor_id']}
+        # Copy the row lists too, so the duplicate never aliases the original's medications or lab tests
+        duplicated_data = _drtmpl_copy_template_data({k: v for k, v in original_template.items() if k not in ('id', 'created_at', 'updated_at', 'doctor_id')})
         duplicated_data['name'] = new_name
         try: new_template = TemplateService.create_template(duplicated_data, doctor_id)
         except AttributeError: new_template = _drtmpl_mock_create_template(duplicated_data, doctor_id); show_warning_message("Template service mock active.")
-        if new_template: show_success_message(f"Template duplicated as '{new_name}'.")
+        if new_template: _drdash_fetch_template_count.clear(); show_success_message(f"Template duplicated as '{new_name}'.")
     except Exception as e: show_error_message(f"Error duplicating: {e}")
     finally: st.session_state.drtmpl_duplicating_template_id = None; st.rerun()
 
@@ -1180,9 +1280,10 @@ def _drtmpl_render_view_templates_section(doctor: dict): # Prefixed
 
 def _drtmpl_edit_template_action(template_data): # Prefixed
     st.session_state.drtmpl_editing_template_id = template_data['id']
-    st.session_state.drtmpl_template_form_data = copy.deepcopy(template_data)
-    if 'medications' not in st.session_state.drtmpl_template_form_data or st.session_state.drtmpl_template_form_data['medications'] is None: st.session_state.drtmpl_template_form_data['medications'] = []
-    if 'lab_tests' not in st.session_state.drtmpl_template_form_data or st.session_state.drtmpl_template_form_data['lab_tests'] is None: st.session_state.drtmpl_template_form_data['lab_tests'] = []
+    form_data = _drtmpl_copy_template_data(template_data)
+    for field in ('medications', 'lab_tests'):
+        if not isinstance(form_data.get(field), list): form_data[field] = []
+    st.session_state.drtmpl_template_form_data = form_data
     st.rerun()
 
 def _drtmpl_render_edit_template_section(doctor: dict): # Prefixed
@@ -1192,23 +1293,25 @@ def _drtmpl_render_edit_template_section(doctor: dict): # Prefixed
 
     with st.form("drtmpl_template_form"):
         form_data['name'] = st.text_input("Template Name", value=form_data.get('name', ''))
-        cats = TEMPLATE_CONFIG.get('CATEGORIES', ["General", "Follow-up"])
-        curr_cat = form_data.get('category', cats[0]); cat_idx = cats.index(curr_cat) if curr_cat in cats else 0
-        form_data['category'] = st.selectbox("Category", options=cats, index=cat_idx)
+        cat_options, cat_index = _drtmpl_category_options()
+        form_data['category'] = st.selectbox("Category", options=cat_options, index=cat_index.get(form_data.get('category'), 0))
         form_data['description'] = st.text_area("Description", value=form_data.get('description', ''))
         form_data['diagnosis'] = st.text_area("Diagnosis", value=form_data.get('diagnosis', ''))
         form_data['instructions'] = st.text_area("Instructions", value=form_data.get('instructions', ''))
         if 'medications' not in form_data or not isinstance(form_data['medications'], list): form_data['medications'] = []
-        form_data['medications'] = st.data_editor(form_data['medications'], num_rows="dynamic", key="drtmpl_med_editor", column_config={"name":"Medication", "dosage":"Dosage", "frequency":"Frequency", "duration":"Duration"})
         if 'lab_tests' not in form_data or not isinstance(form_data['lab_tests'], list): form_data['lab_tests'] = []
-        form_data['lab_tests'] = st.data_editor(form_data['lab_tests'], num_rows="dynamic", key="drtmpl_lab_editor", column_config={"name":"Test Name", "instructions":"Instructions"})
+        # The editors keep their row diffs in widget state against the stored lists, so those inputs stay
+        # unchanged across reruns; the edited rows are only merged into the saved data on submit
+        edited_medications = st.data_editor(form_data['medications'], num_rows="dynamic", key="drtmpl_med_editor", column_config={"name":"Medication", "dosage":"Dosage", "frequency":"Frequency", "duration":"Duration"})
+        edited_lab_tests = st.data_editor(form_data['lab_tests'], num_rows="dynamic", key="drtmpl_lab_editor", column_config={"name":"Test Name", "instructions":"Instructions"})
 
         c1,c2=st.columns(2)
         if c1.form_submit_button("Save Template" if is_new else "Update Template", use_container_width=True):
             if not form_data['name']: show_error_message("Name is required.")
             else:
-                if is_new: _drtmpl_handle_save_template(form_data, doctor['id'])
-                else: _drtmpl_handle_update_template(st.session_state.drtmpl_editing_template_id, form_data, doctor['id'])
+                submitted_data = {**form_data, 'medications': edited_medications, 'lab_tests': edited_lab_tests}
+                if is_new: _drtmpl_handle_save_template(submitted_data, doctor['id'])
+                else: _drtmpl_handle_update_template(st.session_state.drtmpl_editing_template_id, submitted_data, doctor['id'])
         if c2.form_submit_button("Cancel", type="secondary", use_container_width=True):
             st.session_state.drtmpl_editing_template_id = None; st.session_state.drtmpl_template_form_data = {}; st.rerun()
 
@@ -1222,10 +1325,6 @@ def render_doctor_templates(user: dict): # Renamed from show_templates_page
     for key, default_val in [('drtmpl_editing_template_id', None), ('drtmpl_template_form_data', {}), ('drtmpl_duplicating_template_id', None)]:
         if key not in st.session_state: st.session_state[key] = default_val
 
-    # Initialize mock DB for templates if not using real queries
-    if not DB_QUERIES_AVAILABLE or not hasattr(TemplateQueries, 'get_doctor_templates'): _drtmpl_initialize_mock_db()
-
-
     if st.session_state.drtmpl_editing_template_id is not None: _drtmpl_render_edit_template_section(user)
     else: _drtmpl_render_view_templates_section(user)
 # --- Doctor's Templates Page End ---
@@ -1240,34 +1339,77 @@ _DRMED_MOCK_MEDICATIONS_DB = [ # Prefixed global mock DB
 ]
 _DRMED_MOCK_FAVORITE_MEDS = {} # doctor_id: {med_id1, med_id2}
 
+@st.cache_resource
+def _drmed_drug_class_options(): # Prefixed
+    """Drug class filter options and a value -> position map, built on first use and shared across reruns."""
+    options = ("All",) + tuple(sorted(set(DRUG_CLASSES if isinstance(DRUG_CLASSES, list) and DRUG_CLASSES else ["Analgesics", "Other"])))
+    return options, {c: i for i, c in enumerate(options)}
+
+@st.cache_resource
+def _drmed_mock_med_frame(): # Prefixed
+    """Arrow-backed filter columns for the mock DB, built on first mock search; row i is record i of the mock DB."""
+    return pd.DataFrame({
+        'name_lc': pd.array([m['name'].lower() for m in _DRMED_MOCK_MEDICATIONS_DB], dtype="string[pyarrow]"),
+        'generic_lc': pd.array([(m.get('generic_name') or '').lower() for m in _DRMED_MOCK_MEDICATIONS_DB], dtype="string[pyarrow]"),
+        'drug_class': pd.array([m.get('drug_class') for m in _DRMED_MOCK_MEDICATIONS_DB], dtype="string[pyarrow]"),
+    })
+
 def _drmed_get_mock_medications(search_term: str, drug_class: str, favorites_only: bool, doctor_id: str): # Prefixed
-    results = copy.deepcopy(_DRMED_MOCK_MEDICATIONS_DB)
-    doctor_favorites = _DRMED_MOCK_FAVORITE_MEDS.get(doctor_id, set())
+    # The favorites snapshot is part of the cache key, so a toggle simply misses instead of needing a clear
+    return _drmed_filter_mock_medications(search_term, drug_class, favorites_only,
+                                          frozenset(_DRMED_MOCK_FAVORITE_MEDS.get(doctor_id, ())))
+
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _drmed_filter_mock_medications(search_term: str, drug_class: str, favorites_only: bool, doctor_favorites: frozenset):
+    # Search and class filters are vectorized masks; only surviving records are shallow-copied to carry is_favorite
+    df = _drmed_mock_med_frame()
+    mask = pd.Series(True, index=df.index)
     if search_term:
         search_term_lower = search_term.lower()
-        results = [m for m in results if search_term_lower in m['name'].lower() or search_term_lower in m.get('generic_name','').lower()]
-    if drug_class != "All": results = [m for m in results if m.get('drug_class') == drug_class]
-    for med in results: med['is_favorite'] = med['id'] in doctor_favorites
-    if favorites_only: results = [m for m in results if m['is_favorite']]
-    return results
+        mask &= df['name_lc'].str.contains(search_term_lower, regex=False) | df['generic_lc'].str.contains(search_term_lower, regex=False)
+    if drug_class != "All":
+        mask &= df['drug_class'].eq(drug_class).fillna(False)
+    candidates = (_DRMED_MOCK_MEDICATIONS_DB[i] for i in df.index[mask.to_numpy(dtype=bool)])
+    # Membership is tested once per surviving row and reused for both the favorites filter and the flag
+    return [{**m, 'is_favorite': is_fav} for m in candidates
+            if (is_fav := m['id'] in doctor_favorites) or not favorites_only]
 
 def _drmed_mock_toggle_favorite_medication(medication_id: str, doctor_id: str): # Prefixed
-    if doctor_id not in _DRMED_MOCK_FAVORITE_MEDS: _DRMED_MOCK_FAVORITE_MEDS[doctor_id] = set()
-    is_currently_favorite = medication_id in _DRMED_MOCK_FAVORITE_MEDS[doctor_id]
-    if is_currently_favorite: _DRMED_MOCK_FAVORITE_MEDS[doctor_id].remove(medication_id); return False
-    else: _DRMED_MOCK_FAVORITE_MEDS[doctor_id].add(medication_id); return True
+    favorites = _DRMED_MOCK_FAVORITE_MEDS.setdefault(doctor_id, set())
+    favorites ^= {medication_id} # Toggles membership in place
+    return medication_id in favorites
 
 def _drmed_handle_toggle_favorite(medication_id: str, doctor_id: str, is_currently_favorite: bool): # Prefixed
+    # on_click callback inside the card fragment: it runs before that fragment reruns, and the new status is
+    # recorded in session state because the fragment rerun reuses the card data it was first called with.
+    # Feedback goes through st.toast, which a fragment-scoped callback can emit without touching the page layout.
     try:
         new_fav_status = MedicationQueries.toggle_favorite_medication(medication_id, doctor_id, not is_currently_favorite) if DB_QUERIES_AVAILABLE else _drmed_mock_toggle_favorite_medication(medication_id, doctor_id)
         action = "added to" if new_fav_status else "removed from"
-        show_success_message(f"Medication {action} favorites.")
+        st.toast(f"Medication {action} favorites.", icon="✅")
     except AttributeError: # Fallback for mock if toggle_favorite_medication doesn't take 3 args
         new_fav_status = _drmed_mock_toggle_favorite_medication(medication_id, doctor_id)
         action = "added to" if new_fav_status else "removed from"
-        show_warning_message(f"Medication {action} favorites (mock toggle).")
-    except Exception as e: show_error_message(f"Error updating favorite status: {e}")
-    st.rerun()
+        st.toast(f"Medication {action} favorites (mock toggle).", icon="⚠️")
+    except Exception as e: st.toast(f"Error updating favorite status: {e}", icon="❌"); return
+    st.session_state.setdefault('drmed_fav_status', {})[medication_id] = new_fav_status
+
+def _drmed_show_medication_details(medication_name: str): # Prefixed
+    st.toast(f"Details for {medication_name} (placeholder).")
+
+@fragment
+def _drmed_render_medication_card(med_item_data: dict, doctor: dict): # Prefixed
+    # A favorite click reruns only this card, not the filters, the query and every other card
+    is_fav = st.session_state.get('drmed_fav_status', {}).get(med_item_data['id'], med_item_data.get('is_favorite', False))
+    fav_label = "🌟 Unfavorite" if is_fav else "⭐ Favorite"
+    try: MedicationCard(medication_data={**med_item_data, 'is_favorite': is_fav}, actions={}, key=f"drmed_card_{med_item_data['id']}")
+    except Exception as e: st.error(f"Error rendering card for {med_item_data.get('name')}: {e}")
+    # Shared module-level handlers with per-card args, instead of fresh closures per card per rerun
+    fav_col, details_col = st.columns(2)
+    fav_col.button(fav_label, key=f"drmed_fav_btn_{med_item_data['id']}", on_click=_drmed_handle_toggle_favorite,
+                   args=(med_item_data['id'], doctor['id'], is_fav))
+    details_col.button("View Details", key=f"drmed_details_btn_{med_item_data['id']}", on_click=_drmed_show_medication_details,
+                       args=(med_item_data['name'],))
 
 def _drmed_render_medication_search_and_filters(): # Prefixed
     st.subheader("🔍 Search & Filter Medications")
@@ -1276,11 +1418,9 @@ def _drmed_render_medication_search_and_filters(): # Prefixed
 
     filter_cols = st.columns([2, 1, 1])
     with filter_cols[0]:
-        available_drug_classes = DRUG_CLASSES if isinstance(DRUG_CLASSES, list) and DRUG_CLASSES else ["Analgesics", "Other"]
-        all_drug_classes_options = ["All"] + sorted(list(set(available_drug_classes)))
         current_drug_class = st.session_state.get('drmed_drug_class', "All")
-        idx = all_drug_classes_options.index(current_drug_class) if current_drug_class in all_drug_classes_options else 0
-        st.session_state.drmed_drug_class = st.selectbox("Filter by Drug Class:", options=all_drug_classes_options, index=idx, key="drmed_drug_class_filter")
+        class_options, class_index = _drmed_drug_class_options()
+        st.session_state.drmed_drug_class = st.selectbox("Filter by Drug Class:", options=class_options, index=class_index.get(current_drug_class, 0), key="drmed_drug_class_filter")
     with filter_cols[1]:
         st.session_state.drmed_show_favorites = st.checkbox("Show Only My Favorites ⭐", value=st.session_state.get('drmed_show_favorites', False), key="drmed_favorites_filter")
     with filter_cols[2]:
@@ -1305,12 +1445,7 @@ def _drmed_render_medications_list(doctor: dict): # Prefixed
     num_columns = 3; item_cols = st.columns(num_columns)
     for i, med_item_data in enumerate(medications_list):
         with item_cols[i % num_columns]:
-            is_fav = med_item_data.get('is_favorite', False)
-            fav_label = "🌟 Unfavorite" if is_fav else "⭐ Favorite"
-            card_actions = {fav_label: lambda m_id=med_item_data['id'], d_id=doctor['id'], current_fav=is_fav: _drmed_handle_toggle_favorite(m_id, d_id, current_fav),
-                            "View Details": lambda m_name=med_item_data['name']: st.toast(f"Details for {m_name} (placeholder).")}
-            try: MedicationCard(medication_data=med_item_data, actions=card_actions, key=f"drmed_card_{med_item_data['id']}")
-            except Exception as e: st.error(f"Error rendering card for {med_item_data.get('name')}: {e}")
+            _drmed_render_medication_card(med_item_data, doctor)
 
 def render_doctor_medications(user: dict): # Renamed from show_medications_page
     require_role_access([USER_ROLES['DOCTOR']])
@@ -1331,4 +1466,6 @@ def render_doctor_medications(user: dict): # Renamed from show_medications_page
     _drmed_render_medications_list(user)
 # --- Doctor's Medications Page End ---
 
-# --- Doctor's Today's Patients Page Start ---
+# Single entrypoint, kept at the end so every page function above is defined before the first render
+if __name__ == "__main__":
+    run_app()
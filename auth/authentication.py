@@ -258,6 +258,8 @@ def is_authenticated() -> bool:
         not is_session_expired()
     )
 
+_SESSION_MAX_DURATION = timedelta(minutes=SESSION_CONFIG['TIMEOUT_MINUTES'])
+
 def is_session_expired() -> bool:
     """
     Check if session has expired
@@ -270,12 +272,12 @@ def is_session_expired() -> bool:
     
     login_time = st.session_state.login_time
     if isinstance(login_time, str):
-        login_time = datetime.fromisoformat(login_time)
+        # Keep the parsed value so the checks on later reruns don't parse it again
+        login_time = st.session_state.login_time = datetime.fromisoformat(login_time)
     
     session_duration = datetime.now() - login_time
-    max_duration = timedelta(minutes=SESSION_CONFIG['TIMEOUT_MINUTES'])
     
-    return session_duration > max_duration
+    return session_duration > _SESSION_MAX_DURATION
 
 def get_current_user() -> Optional[Dict[str, Any]]:
     """
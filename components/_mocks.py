@@ -0,0 +1,124 @@
+"""
+MedScript Pro - Fallback UI Components
+Lightweight stand-ins used by pages when the full component modules cannot be imported.
+"""
+
+from datetime import date, datetime
+from html import escape
+import streamlit as st
+
+from utils.helpers import show_error_message, parse_date
+
+class MockSearchFormComponent:
+    """Text-input search form that only commits the term on submit"""
+
+    def __init__(self, search_function=None, result_key_prefix=None, form_key=None, placeholder="Search...", label="Search", session_state_key="default_search_term", auto_submit=False, button_text="Search"):
+        self.placeholder, self.label, self.session_state_key = placeholder, label, session_state_key
+        self.form_key, self.button_text = form_key or f"{session_state_key}_form", button_text
+
+    def render(self):
+        # Inside a form, keystrokes don't rerun the script; only Enter or the submit button does
+        with st.form(self.form_key, clear_on_submit=False):
+            term = st.text_input(self.label, value=st.session_state.get(self.session_state_key, ""), placeholder=self.placeholder, key=f"mock_search_{self.session_state_key}")
+            submitted = st.form_submit_button(self.button_text)
+        if submitted:
+            st.session_state[self.session_state_key] = term
+        return submitted
+
+    def get_search_query(self):
+        return st.session_state.get(self.session_state_key, "")
+
+def MockMedicationCard(medication_data, actions=None, key=None, show_actions=True):
+    """Read-only medication card; actions are only shown when show_actions is set"""
+    # Static details go out as a single markdown element rather than one call per line
+    get = lambda field: escape(str(medication_data.get(field, 'N/A')))
+    indications = escape(', '.join(medication_data.get('indications', ['N/A'])))
+    st.markdown(
+        f"<div class='info-card'><strong>{get('name')}</strong><br>"
+        f"<small>Generic: {get('generic_name')} | Class: {get('drug_class')}<br>"
+        f"Form: {get('form')} | Strength: {get('strength')}<br>"
+        f"Indications: {indications}<br>Notes: {get('notes')}</small></div>",
+        unsafe_allow_html=True
+    )
+    if show_actions and actions:
+        for action_label, action_func in actions.items():
+            if st.button(action_label, key=f"{key}_{action_label.lower().replace(' ', '_')}_mock_med_card"):
+                action_func()
+
+def MockLabTestCard(lab_test_data, actions=None, key=None, show_actions=True):
+    """Read-only lab test card; actions are only shown when show_actions is set"""
+    # Static details go out as a single markdown element rather than one call per line
+    get = lambda field: escape(str(lab_test_data.get(field, 'N/A')))
+    st.markdown(
+        f"<div class='info-card'><strong>{get('name')}</strong><br>"
+        f"<small>Category: {get('category')} | Specimen: {get('specimen_type')}<br>"
+        f"Description: {get('description')}<br>"
+        f"Turnaround Time: {get('turnaround_time')} | Preparation: {get('preparation_instructions')}</small></div>",
+        unsafe_allow_html=True
+    )
+    if show_actions and actions:
+        for action_label, action_func in actions.items():
+            if st.button(action_label, key=f"{key}_{action_label.lower().replace(' ', '_')}_mock_lab_card"):
+                action_func()
+
+class MockPatientFormComponent:
+    """Patient registration/edit form returning the submitted fields, or {"cancelled": True}"""
+    def __init__(self, edit_mode=False, patient_data=None, key_prefix="patient_form", required_fields=None):
+        self.edit_mode = edit_mode
+        self.patient_data = patient_data if patient_data else {}
+        self.key_prefix = key_prefix
+        self.required_fields = required_fields or ['first_name', 'last_name', 'dob', 'phone_number']
+        st.info("Using Mock PatientFormComponent.")
+
+    def render(self):
+        submitted_data = None
+        with st.form(key=f"{self.key_prefix}_form_main"): # Changed key
+            form_data = {}
+            form_data['first_name'] = st.text_input("First Name*", value=self.patient_data.get('first_name', ''), key=f"{self.key_prefix}_fname_main")
+            form_data['last_name'] = st.text_input("Last Name*", value=self.patient_data.get('last_name', ''), key=f"{self.key_prefix}_lname_main")
+
+            dob_val = self.patient_data.get('dob')
+            if isinstance(dob_val, str):
+                dob_val = parse_date(dob_val)
+            elif isinstance(dob_val, datetime):
+                dob_val = dob_val.date()
+
+            form_data['dob'] = st.date_input("Date of Birth*", value=dob_val, key=f"{self.key_prefix}_dob_main", min_value=date(1900,1,1), max_value=date.today())
+            form_data['phone_number'] = st.text_input("Phone Number*", value=self.patient_data.get('phone_number', ''), key=f"{self.key_prefix}_phone_main")
+            form_data['email'] = st.text_input("Email Address", value=self.patient_data.get('email', ''), key=f"{self.key_prefix}_email_main")
+            form_data['address'] = st.text_area("Address", value=self.patient_data.get('address', ''), key=f"{self.key_prefix}_address_main")
+            form_data['emergency_contact_name'] = st.text_input("Emergency Contact Name", value=self.patient_data.get('emergency_contact_name', ''), key=f"{self.key_prefix}_econtact_name_main")
+            form_data['emergency_contact_phone'] = st.text_input("Emergency Contact Phone", value=self.patient_data.get('emergency_contact_phone', ''), key=f"{self.key_prefix}_econtact_phone_main")
+            form_data['allergies'] = st.text_area("Allergies", value=self.patient_data.get('allergies', ''), key=f"{self.key_prefix}_allergies_main")
+            form_data['medical_history'] = st.text_area("Medical History Summary", value=self.patient_data.get('medical_history', ''), key=f"{self.key_prefix}_medhist_main")
+
+
+            submit_btn_label = "Update Patient" if self.edit_mode else "Register Patient"
+            col1, col2 = st.columns([3,1])
+            with col1:
+                if st.form_submit_button(submit_btn_label, use_container_width=True, type="primary"):
+                    # Basic validation for mock
+                    valid = True
+                    for field in self.required_fields:
+                        if not form_data.get(field):
+                            show_error_message(f"{field.replace('_',' ').title()} is required.")
+                            valid = False
+                    if valid:
+                         submitted_data = {k: (v.isoformat() if isinstance(v, (date, datetime)) else v) for k,v in form_data.items()}
+            with col2:
+                if st.form_submit_button("Cancel", type="secondary", use_container_width=True):
+                    submitted_data = {"cancelled": True}
+        return submitted_data
+
+def MockPatientCard(patient_data, actions, key):
+    """Name/DOB/phone summary with one button per action"""
+    # Static details go out as a single markdown element rather than one call per line
+    get = lambda field: escape(str(patient_data.get(field, 'N/A')))
+    st.markdown(
+        f"<div class='info-card'><strong>{get('first_name')} {get('last_name')}</strong> (ID: {get('id')})<br>"
+        f"<small>DOB: {get('dob')}, Phone: {get('phone_number')}</small></div>",
+        unsafe_allow_html=True
+    )
+    for action_label, action_func in actions.items():
+        if st.button(action_label, key=f"{key}_{action_label.lower().replace(' ', '_')}_cardbtn"):
+            action_func()
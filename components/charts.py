@@ -387,6 +387,48 @@ class MultiSeriesChart(BaseChart):
         except Exception as e:
             st.error(f"Error rendering multi-series chart: {str(e)}")
 
+class FacetedBarChart(BaseChart):
+    """Side-by-side bar panels rendered as a single figure"""
+    
+    def __init__(self, panels: List[Dict[str, Any]], orientation: str = 'h', **kwargs):
+        super().__init__(**kwargs)
+        self.panels = panels  # [{'title': 'Top Meds', 'data': [...], 'x_field': 'name', 'y_field': 'count'}, ...]
+        self.orientation = orientation
+    
+    def render(self):
+        """Render all panels in one plotly chart"""
+        panels = [panel for panel in self.panels if len(panel.get('data', []))]
+        if not panels:
+            st.info("No data available for chart")
+            return
+        
+        try:
+            fig = make_subplots(rows=1, cols=len(panels),
+                                subplot_titles=[panel.get('title', '') for panel in panels])
+            
+            for i, panel in enumerate(panels):
+                df = pd.DataFrame(panel['data']).sort_values(panel['y_field'], ascending=self.orientation == 'h')
+                labels, values = df[panel['x_field']], df[panel['y_field']]
+                fig.add_trace(go.Bar(
+                    x=values if self.orientation == 'h' else labels,
+                    y=labels if self.orientation == 'h' else values,
+                    orientation=self.orientation,
+                    name=panel.get('title', ''),
+                    marker_color=self.colors[i % len(self.colors)],
+                    hovertemplate='<b>%{y}</b><br>%{x}<extra></extra>' if self.orientation == 'h'
+                    else '<b>%{x}</b><br>%{y}<extra></extra>'
+                ), row=1, col=i + 1)
+            
+            # Apply theme
+            fig = self._apply_theme(fig)
+            fig.update_layout(showlegend=False)
+            
+            # Display chart
+            st.plotly_chart(fig, use_container_width=True, config=self.config)
+        
+        except Exception as e:
+            st.error(f"Error rendering faceted bar chart: {str(e)}")
+
 class HeatmapChart(BaseChart):
     """Heatmap chart for correlation or intensity data"""
     
@@ -15,7 +15,7 @@ from utils.validators import (
     validate_medical_license, validate_birth_date, ValidationResult
 )
 from utils.formatters import format_date_display, format_phone_number
-from utils.helpers import calculate_age
+from utils.helpers import calculate_age, parse_date
 
 class FormComponent:
     """Base class for form components"""
@@ -458,17 +458,9 @@ class PatientFormComponent:
                 )
                 
                 # Birth date with age calculation
-                birth_date = None
-                if self.patient_data.get('date_of_birth'):
-                    try:
-                        if isinstance(self.patient_data['date_of_birth'], str):
-                            birth_date = datetime.strptime(
-                                self.patient_data['date_of_birth'], '%Y-%m-%d'
-                            ).date()
-                        else:
-                            birth_date = self.patient_data['date_of_birth']
-                    except ValueError:
-                        birth_date = None
+                birth_date = self.patient_data.get('date_of_birth') or None
+                if isinstance(birth_date, str):
+                    birth_date = parse_date(birth_date)
                 
                 date_of_birth = st.date_input(
                     "Date of Birth*",
@@ -706,7 +698,7 @@ class VisitFormComponent:
             with col1:
                 visit_date = st.date_input(
                     "Visit Date*",
-                    value=datetime.strptime(self.visit_data.get('visit_date', str(date.today())), '%Y-%m-%d').date() if isinstance(self.visit_data.get('visit_date'), str) else self.visit_data.get('visit_date', date.today()),
+                    value=parse_date(self.visit_data['visit_date']) if isinstance(self.visit_data.get('visit_date'), str) else self.visit_data.get('visit_date', date.today()),
                     min_value=date.today() - timedelta(days=30),
                     max_value=date.today() + timedelta(days=90)
                 )
@@ -8,7 +8,7 @@ import os
 import threading
 import time
 from contextlib import contextmanager
-from typing import Optional, Any, Dict, List, Tuple
+from typing import Optional, Any, Dict, List, Tuple, Union
 import streamlit as st
 from config.settings import DATABASE_PATH, DATABASE_NAME
 
@@ -360,12 +360,13 @@ def check_table_exists(table_name: str) -> bool:
         st.error(f"Error checking if table {table_name} exists: {str(e)}")
         return False
 
-def execute_transaction(queries_and_params: List[Tuple[str, Optional[Tuple]]]) -> bool:
+def execute_transaction(queries_and_params: List[Tuple[str, Optional[Union[Tuple, List[Tuple]]]]]) -> bool:
     """
     Execute multiple queries in a single transaction
     
     Args:
-        queries_and_params (List[Tuple[str, Optional[Tuple]]]): List of (query, params) tuples
+        queries_and_params (List[Tuple[str, Optional[Union[Tuple, List[Tuple]]]]]): List of
+            (query, params) tuples; a list of parameter tuples runs the query with executemany
     
     Returns:
         bool: True if transaction successful, False otherwise
@@ -379,7 +380,9 @@ def execute_transaction(queries_and_params: List[Tuple[str, Optional[Tuple]]]) -
             
             # Execute all queries
             for query, params in queries_and_params:
-                if params:
+                if isinstance(params, list):
+                    cursor.executemany(query, params)
+                elif params:
                     cursor.execute(query, params)
                 else:
                     cursor.execute(query)
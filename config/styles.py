@@ -3,6 +3,8 @@ MedScript Pro - CSS Styles and Theming
 This file contains all the CSS styling for the professional medical interface.
 """
 
+import re
+
 # Main CSS Styles for the application
 MAIN_CSS = """
 <style>
@@ -764,19 +766,37 @@ PRESCRIPTION_CSS = """
 </style>
 """
 
+def _minify_css(css):
+    """Strip comments and collapse whitespace, keeping the <style> wrapper"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
+
+# Minified once at import; these are re-sent to the browser on every full rerun
+_MAIN_CSS_MIN = _minify_css(MAIN_CSS)
+_COMPONENT_CSS_MIN = {name: _minify_css(css) for name, css in COMPONENT_CSS.items()}
+_PRESCRIPTION_CSS_MIN = _minify_css(PRESCRIPTION_CSS)
+
 # Function to inject CSS
 def inject_css():
-    """Inject the main CSS styles into the Streamlit app"""
+    """
+    Inject the main CSS styles into the Streamlit app
+    
+    Must run on every full script rerun: Streamlit removes elements that a run
+    does not re-emit, so a once-per-session guard would drop the styles after the
+    first interaction. Fragment reruns keep the existing style block and never
+    reach this call. The payload is kept small instead, by minifying once at import.
+    """
     import streamlit as st
-    st.markdown(MAIN_CSS, unsafe_allow_html=True)
+    st.markdown(_MAIN_CSS_MIN, unsafe_allow_html=True)
 
 def inject_component_css(component_name):
     """Inject specific component CSS"""
     import streamlit as st
-    if component_name in COMPONENT_CSS:
-        st.markdown(COMPONENT_CSS[component_name], unsafe_allow_html=True)
+    if component_name in _COMPONENT_CSS_MIN:
+        st.markdown(_COMPONENT_CSS_MIN[component_name], unsafe_allow_html=True)
 
 def inject_prescription_css():
     """Inject prescription form CSS"""
     import streamlit as st
-    st.markdown(PRESCRIPTION_CSS, unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown(_PRESCRIPTION_CSS_MIN, unsafe_allow_html=True)
\ No newline at end of file
@@ -11,7 +11,7 @@ from config.settings import (
     DEFAULT_ADMIN, DEMO_USERS, VISIT_TYPES, GENDER_OPTIONS,
     DRUG_CLASSES, COMMON_CONDITIONS, COMMON_ALLERGIES
 )
-from database.models import create_all_tables, create_triggers
+from database.models import create_all_tables, create_triggers, migrate_database
 import streamlit as st
 
 def hash_password(password: str) -> str:
@@ -869,7 +869,8 @@ def check_and_initialize_database():
                 return initialize_database()
             else:
                 # st.success("Database found and ready!") # Line removed/commented
-                return True
+                # Existing databases never rerun create_all_tables, so indexes added since then are created here
+                return migrate_database()
                 
     except Exception as e:
         st.error(f"Error checking database: {str(e)}")
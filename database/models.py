@@ -6,8 +6,8 @@ This file contains all the database table definitions and relationships for the
 from config.database import execute_query, execute_transaction
 import streamlit as st
 
-# Database schema version
-DATABASE_VERSION = 1
+# Database schema version (2: composite indexes for today's visits and doctor prescription search)
+DATABASE_VERSION = 2
 
 def create_all_tables():
     """
@@ -317,6 +317,7 @@ def create_indexes():
             "CREATE INDEX IF NOT EXISTS idx_visits_visit_date ON patient_visits (visit_date)",
             "CREATE INDEX IF NOT EXISTS idx_visits_created_by ON patient_visits (created_by)",
             "CREATE INDEX IF NOT EXISTS idx_visits_consultation_completed ON patient_visits (consultation_completed)",
+            "CREATE INDEX IF NOT EXISTS idx_visits_date_completed ON patient_visits (visit_date, consultation_completed, visit_time)",
             
             # Medications table indexes
             "CREATE INDEX IF NOT EXISTS idx_medications_name ON medications (name)",
@@ -338,6 +339,7 @@ def create_indexes():
             "CREATE INDEX IF NOT EXISTS idx_prescriptions_visit_id ON prescriptions (visit_id)",
             "CREATE INDEX IF NOT EXISTS idx_prescriptions_status ON prescriptions (status)",
             "CREATE INDEX IF NOT EXISTS idx_prescriptions_created_at ON prescriptions (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_prescriptions_doctor_created ON prescriptions (doctor_id, created_at DESC)",
             
             # Prescription items table indexes
             "CREATE INDEX IF NOT EXISTS idx_prescription_items_prescription_id ON prescription_items (prescription_id)",
@@ -375,6 +377,31 @@ def create_indexes():
         st.error(f"Error creating database indexes: {str(e)}")
         return False
 
+def migrate_database():
+    """
+    Bring an existing database up to DATABASE_VERSION
+    
+    Indexes use CREATE INDEX IF NOT EXISTS, so re-running create_indexes adds
+    any that were introduced after the database was first created.
+    
+    Returns:
+        bool: True if the database is at the current version, False otherwise
+    """
+    try:
+        result = execute_query("PRAGMA user_version", fetch='one')
+        if result and result['user_version'] >= DATABASE_VERSION:
+            return True
+        
+        if not create_indexes():
+            return False
+        
+        execute_query(f"PRAGMA user_version = {DATABASE_VERSION}")
+        return True
+        
+    except Exception as e:
+        st.error(f"Error migrating database: {str(e)}")
+        return False
+
 def create_triggers():
     """Create database triggers for automatic updates"""
     try:
@@ -192,7 +192,7 @@ class PatientQueries:
     
     @staticmethod
     def search_patients(search_term: str = "", created_by: int = None, 
-                       limit: int = 100) -> List[Dict[str, Any]]:
+                       limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Search patients"""
         base_query = """
         SELECT p.*, u.full_name as created_by_name
@@ -204,11 +204,12 @@ class PatientQueries:
         params = []
         
         if search_term:
+            # SQLite's LIKE already ignores ASCII case, so the columns are matched as stored rather than lowered per row
             base_query += """ AND (
-                LOWER(p.first_name) LIKE ? OR 
-                LOWER(p.last_name) LIKE ? OR 
-                LOWER(p.patient_id) LIKE ? OR
-                LOWER(p.phone) LIKE ?
+                p.first_name LIKE ? OR 
+                p.last_name LIKE ? OR 
+                p.patient_id LIKE ? OR
+                p.phone LIKE ?
             )"""
             search_param = f"%{search_term.lower()}%"
             params.extend([search_param, search_param, search_param, search_param])
@@ -217,7 +218,9 @@ class PatientQueries:
             base_query += " AND p.created_by = ?"
             params.append(created_by)
         
-        base_query += f" ORDER BY p.last_name, p.first_name LIMIT {limit}"
+        # Without a term the caller is browsing, so the most recently registered patients come first
+        order_by = "p.last_name, p.first_name" if search_term else "p.created_at DESC"
+        base_query += f" ORDER BY {order_by} LIMIT {int(limit)} OFFSET {int(offset)}"
         
         return execute_query(base_query, params, fetch='all')
     
@@ -344,6 +347,41 @@ class VisitQueries:
             st.error(f"Error updating visit: {str(e)}")
             return False
     
+    @staticmethod
+    def get_today_visits(status: str = None) -> List[Dict[str, Any]]:
+        """Get the clinic's visits for today, optionally only those with the given status ('Scheduled' or 'Completed')"""
+        query = """
+        SELECT pv.id AS visit_id, pv.patient_id, p.first_name AS patient_first_name,
+               p.last_name AS patient_last_name, p.date_of_birth AS patient_dob,
+               p.gender AS patient_gender, pv.visit_date, pv.visit_time, pv.visit_type,
+               pv.current_problems, pv.notes,
+               CASE WHEN pv.consultation_completed = 1 THEN 'Completed' ELSE 'Scheduled' END AS status
+        FROM patient_visits pv
+        JOIN patients p ON p.id = pv.patient_id
+        WHERE pv.visit_date = date('now') AND p.is_active = 1
+        """
+        params = []
+        
+        if status:
+            query += " AND pv.consultation_completed = ?"
+            params.append(1 if status.lower() == 'completed' else 0)
+        
+        query += " ORDER BY pv.visit_time"
+        return execute_query(query, params, fetch='all')
+    
+    @staticmethod
+    def get_today_visit_counts() -> Dict[str, int]:
+        """Get the number of the clinic's visits for today per status"""
+        query = """
+        SELECT CASE WHEN pv.consultation_completed = 1 THEN 'Completed' ELSE 'Scheduled' END AS status,
+               COUNT(*) AS count
+        FROM patient_visits pv
+        JOIN patients p ON p.id = pv.patient_id
+        WHERE pv.visit_date = date('now') AND p.is_active = 1
+        GROUP BY status
+        """
+        return {row['status']: row['count'] for row in execute_query(query, fetch='all')}
+    
     @staticmethod
     def mark_consultation_completed(visit_id: int, prescription_id: int = None) -> bool:
         """Mark consultation as completed"""
@@ -386,7 +424,9 @@ class MedicationQueries:
                 medication_data.get('storage_conditions'), created_by
             )
             
-            return execute_query(query, params)
+            medication_id = execute_query(query, params)
+            get_all_medications.clear()
+            return medication_id
         
         except Exception as e:
             st.error(f"Error creating medication: {str(e)}")
@@ -408,9 +448,9 @@ class MedicationQueries:
         
         if search_term:
             base_query += """ AND (
-                LOWER(m.name) LIKE ? OR 
-                LOWER(m.generic_name) LIKE ? OR 
-                LOWER(m.brand_names) LIKE ?
+                m.name LIKE ? OR 
+                m.generic_name LIKE ? OR 
+                m.brand_names LIKE ?
             )"""
             search_param = f"%{search_term.lower()}%"
             params.extend([search_param, search_param, search_param])
@@ -464,6 +504,7 @@ class MedicationQueries:
             )
             
             execute_query(query, params)
+            get_all_medications.clear()
             return True
         
         except Exception as e:
@@ -485,6 +526,7 @@ class MedicationQueries:
                 WHERE id = ? AND created_by = ?
                 """
                 execute_query(update_query, (new_status, medication_id, created_by))
+                get_all_medications.clear()
                 return True
             
             return False
@@ -517,7 +559,9 @@ class LabTestQueries:
                 test_data.get('cost'), created_by
             )
             
-            return execute_query(query, params)
+            test_id = execute_query(query, params)
+            get_all_lab_tests.clear()
+            return test_id
         
         except Exception as e:
             st.error(f"Error creating lab test: {str(e)}")
@@ -538,9 +582,9 @@ class LabTestQueries:
         
         if search_term:
             base_query += """ AND (
-                LOWER(lt.test_name) LIKE ? OR 
-                LOWER(lt.test_code) LIKE ? OR 
-                LOWER(lt.description) LIKE ?
+                lt.test_name LIKE ? OR 
+                lt.test_code LIKE ? OR 
+                lt.description LIKE ?
             )"""
             search_param = f"%{search_term.lower()}%"
             params.extend([search_param, search_param, search_param])
@@ -568,8 +612,10 @@ class PrescriptionQueries:
     """Database queries for prescription management"""
     
     @staticmethod
-    def create_prescription(prescription_data: Dict[str, Any], doctor_id: int) -> Optional[int]:
-        """Create a new prescription"""
+    def create_prescription(prescription_data: Dict[str, Any], doctor_id: int,
+                          medications: List[Dict[str, Any]] = None,
+                          lab_tests: List[Dict[str, Any]] = None) -> Optional[int]:
+        """Create a new prescription, with its medications and lab tests, in one transaction"""
         try:
             # Generate prescription ID
             prescription_id = generate_unique_id('RX')
@@ -597,6 +643,20 @@ class PrescriptionQueries:
             
             queries_and_params.append((prescription_query, prescription_params))
             
+            # Items reference the new row through its generated prescription_id, so they can be
+            # inserted with executemany in the same transaction instead of one round-trip each
+            if medications:
+                queries_and_params.append((
+                    PrescriptionQueries._ITEM_INSERT.format(prescription="(SELECT id FROM prescriptions WHERE prescription_id = ?)"),
+                    [PrescriptionQueries._item_params(prescription_id, medication) for medication in medications]
+                ))
+            
+            if lab_tests:
+                queries_and_params.append((
+                    PrescriptionQueries._LAB_TEST_INSERT.format(prescription="(SELECT id FROM prescriptions WHERE prescription_id = ?)"),
+                    [PrescriptionQueries._lab_test_params(prescription_id, lab_test) for lab_test in lab_tests]
+                ))
+            
             # Execute transaction
             if execute_transaction(queries_and_params):
                 # Get the prescription ID
@@ -610,29 +670,52 @@ class PrescriptionQueries:
             st.error(f"Error creating prescription: {str(e)}")
             return None
     
+    # {prescription} is either a plain placeholder or a subquery on the generated prescription_id
+    _ITEM_INSERT = """
+    INSERT INTO prescription_items (
+        prescription_id, medication_id, dosage, frequency, duration,
+        quantity, refills, instructions, route_of_administration,
+        start_date, end_date, is_substitutable
+    ) VALUES ({prescription}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    _LAB_TEST_INSERT = """
+    INSERT INTO prescription_lab_tests (
+        prescription_id, lab_test_id, instructions, urgency,
+        sample_collection_date, fasting_required, special_instructions
+    ) VALUES ({prescription}, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _item_params(prescription_key: Any, medication_data: Dict[str, Any]) -> Tuple:
+        """Parameters for _ITEM_INSERT"""
+        return (
+            prescription_key, medication_data['medication_id'],
+            medication_data['dosage'], medication_data['frequency'],
+            medication_data['duration'], medication_data.get('quantity'),
+            medication_data.get('refills', 0), medication_data.get('instructions'),
+            medication_data.get('route_of_administration'),
+            medication_data.get('start_date'), medication_data.get('end_date'),
+            medication_data.get('is_substitutable', True)
+        )
+    
+    @staticmethod
+    def _lab_test_params(prescription_key: Any, lab_test_data: Dict[str, Any]) -> Tuple:
+        """Parameters for _LAB_TEST_INSERT"""
+        return (
+            prescription_key, lab_test_data['lab_test_id'],
+            lab_test_data.get('instructions'), lab_test_data.get('urgency', 'Routine'),
+            lab_test_data.get('sample_collection_date'),
+            lab_test_data.get('fasting_required', False),
+            lab_test_data.get('special_instructions')
+        )
+    
     @staticmethod
     def add_prescription_medication(prescription_id: int, medication_data: Dict[str, Any]) -> bool:
         """Add medication to prescription"""
         try:
-            query = """
-            INSERT INTO prescription_items (
-                prescription_id, medication_id, dosage, frequency, duration,
-                quantity, refills, instructions, route_of_administration,
-                start_date, end_date, is_substitutable
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            params = (
-                prescription_id, medication_data['medication_id'],
-                medication_data['dosage'], medication_data['frequency'],
-                medication_data['duration'], medication_data.get('quantity'),
-                medication_data.get('refills', 0), medication_data.get('instructions'),
-                medication_data.get('route_of_administration'),
-                medication_data.get('start_date'), medication_data.get('end_date'),
-                medication_data.get('is_substitutable', True)
-            )
-            
-            execute_query(query, params)
+            query = PrescriptionQueries._ITEM_INSERT.format(prescription="?")
+            execute_query(query, PrescriptionQueries._item_params(prescription_id, medication_data))
             return True
         
         except Exception as e:
@@ -643,22 +726,8 @@ class PrescriptionQueries:
     def add_prescription_lab_test(prescription_id: int, lab_test_data: Dict[str, Any]) -> bool:
         """Add lab test to prescription"""
         try:
-            query = """
-            INSERT INTO prescription_lab_tests (
-                prescription_id, lab_test_id, instructions, urgency,
-                sample_collection_date, fasting_required, special_instructions
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            params = (
-                prescription_id, lab_test_data['lab_test_id'],
-                lab_test_data.get('instructions'), lab_test_data.get('urgency', 'Routine'),
-                lab_test_data.get('sample_collection_date'),
-                lab_test_data.get('fasting_required', False),
-                lab_test_data.get('special_instructions')
-            )
-            
-            execute_query(query, params)
+            query = PrescriptionQueries._LAB_TEST_INSERT.format(prescription="?")
+            execute_query(query, PrescriptionQueries._lab_test_params(prescription_id, lab_test_data))
             return True
         
         except Exception as e:
@@ -734,7 +803,7 @@ class PrescriptionQueries:
     
     @staticmethod
     def search_prescriptions(search_term: str = "", doctor_id: int = None,
-                           status: str = "", limit: int = 100) -> List[Dict[str, Any]]:
+                           status: str = "", limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Search prescriptions"""
         base_query = """
         SELECT p.*, pt.first_name, pt.last_name, pt.patient_id,
@@ -749,11 +818,11 @@ class PrescriptionQueries:
         
         if search_term:
             base_query += """ AND (
-                LOWER(p.prescription_id) LIKE ? OR 
-                LOWER(p.diagnosis) LIKE ? OR 
-                LOWER(pt.first_name) LIKE ? OR
-                LOWER(pt.last_name) LIKE ? OR
-                LOWER(pt.patient_id) LIKE ?
+                p.prescription_id LIKE ? OR 
+                p.diagnosis LIKE ? OR 
+                pt.first_name LIKE ? OR
+                pt.last_name LIKE ? OR
+                pt.patient_id LIKE ?
             )"""
             search_param = f"%{search_term.lower()}%"
             params.extend([search_param] * 5)
@@ -766,7 +835,7 @@ class PrescriptionQueries:
             base_query += " AND p.status = ?"
             params.append(status)
         
-        base_query += f" ORDER BY p.created_at DESC LIMIT {limit}"
+        base_query += f" ORDER BY p.created_at DESC LIMIT {int(limit)} OFFSET {int(offset)}"
         
         return execute_query(base_query, params, fetch='all')
 
@@ -960,33 +1029,47 @@ class DashboardQueries:
     
     @staticmethod
     def get_today_summary() -> Dict[str, Any]:
-        """Get today's summary data"""
+        """Get today's summary data in a single query"""
         try:
-            # Today's visits
-            visits_query = "SELECT COUNT(*) as count FROM patient_visits WHERE visit_date = date('now')"
-            visits_result = execute_query(visits_query, fetch='one')
-            
-            # Today's prescriptions
-            prescriptions_query = "SELECT COUNT(*) as count FROM prescriptions WHERE date(created_at) = date('now')"
-            prescriptions_result = execute_query(prescriptions_query, fetch='one')
-            
-            # Completed consultations today
-            completed_query = """
-            SELECT COUNT(*) as count FROM patient_visits 
-            WHERE visit_date = date('now') AND consultation_completed = 1
+            query = """
+            SELECT
+                COUNT(*) as todays_visits,
+                COALESCE(SUM(consultation_completed = 1), 0) as completed_consultations,
+                (SELECT COUNT(*) FROM prescriptions
+                 WHERE date(created_at) = date('now')) as todays_prescriptions
+            FROM patient_visits
+            WHERE visit_date = date('now')
             """
-            completed_result = execute_query(completed_query, fetch='one')
-            
-            return {
-                'todays_visits': visits_result['count'] if visits_result else 0,
-                'todays_prescriptions': prescriptions_result['count'] if prescriptions_result else 0,
-                'completed_consultations': completed_result['count'] if completed_result else 0
-            }
+            result = execute_query(query, fetch='one')
+            return result or {}
         
         except Exception as e:
             st.error(f"Error getting today's summary: {str(e)}")
             return {}
     
+    @staticmethod
+    def get_assistant_summary(assistant_id: int, days_back: int = 30) -> Dict[str, Any]:
+        """Get the assistant dashboard counts in a single query"""
+        try:
+            period = f"-{int(days_back)} days"
+            query = """
+            SELECT
+                (SELECT COUNT(*) FROM patients
+                 WHERE created_by = ? AND created_at >= datetime('now', ?)) as patients_registered,
+                (SELECT COUNT(*) FROM patient_visits
+                 WHERE created_by = ? AND created_at >= datetime('now', ?)) as visits_recorded,
+                (SELECT COUNT(*) FROM patients
+                 WHERE created_by = ? AND is_active = 1) as total_patients,
+                (SELECT COUNT(*) FROM patient_visits
+                 WHERE visit_date = date('now') AND consultation_completed = 0) as upcoming_visits_today
+            """
+            result = execute_query(query, (assistant_id, period, assistant_id, period, assistant_id), fetch='one')
+            return result or {}
+        
+        except Exception as e:
+            st.error(f"Error getting assistant summary: {str(e)}")
+            return {}
+    
     @staticmethod
     def get_recent_activity(user_id: int = None, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent activity for dashboard"""
@@ -1097,27 +1180,23 @@ def create_complete_prescription(prescription_data: Dict[str, Any],
                                doctor_id: int) -> Optional[int]:
     """Create complete prescription with medications and lab tests"""
     try:
-        # Create prescription
-        prescription_id = PrescriptionQueries.create_prescription(prescription_data, doctor_id)
-        if not prescription_id:
-            return None
-        
-        # Add medications
-        for medication in medications:
-            if not PrescriptionQueries.add_prescription_medication(prescription_id, medication):
-                st.warning(f"Failed to add medication: {medication.get('medication_name', 'Unknown')}")
-        
-        # Add lab tests
-        for lab_test in lab_tests:
-            if not PrescriptionQueries.add_prescription_lab_test(prescription_id, lab_test):
-                st.warning(f"Failed to add lab test: {lab_test.get('test_name', 'Unknown')}")
-        
-        return prescription_id
+        # A failed item now rolls back the whole prescription instead of leaving it partially saved
+        return PrescriptionQueries.create_prescription(prescription_data, doctor_id, medications, lab_tests)
     
     except Exception as e:
         st.error(f"Error creating complete prescription: {str(e)}")
         return None
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_all_medications() -> List[Dict[str, Any]]:
+    """Get the active medication catalog; cleared by the MedicationQueries write methods"""
+    return MedicationQueries.search_medications("")
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_all_lab_tests() -> List[Dict[str, Any]]:
+    """Get the active lab test catalog; cleared by the LabTestQueries write methods"""
+    return LabTestQueries.search_lab_tests("")
+
 def search_all_entities(search_term: str, entity_types: List[str] = None,
                        user_id: int = None, limit_per_type: int = 10) -> Dict[str, List[Dict[str, Any]]]:
     """Search across multiple entity types"""
@@ -1,6 +1,6 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import copy
+import pandas as pd
 
 # Config and Auth
 from config.settings import USER_ROLES, DRUG_CLASSES
@@ -8,6 +8,13 @@ from config.styles import inject_css
 from auth.authentication import require_authentication, get_current_user
 from auth.permissions import require_role_access
 
+# Drug-class filter options are static config; the page script re-runs on every rerun, so they live in a resource cache
+_DEFAULT_DRUG_CLASSES = ["Analgesics", "Antibiotics", "NSAIDs", "ACE Inhibitors", "Biguanides", "Penicillin Antibiotics", "Other"]
+
+@st.cache_resource
+def _asst_drug_class_options():
+    return ("All",) + tuple(sorted(set(DRUG_CLASSES if isinstance(DRUG_CLASSES, list) and DRUG_CLASSES else _DEFAULT_DRUG_CLASSES)))
+
 # Components
 try:
     from components.cards import MedicationCard
@@ -15,27 +22,7 @@ try:
     COMPONENTS_AVAILABLE = True
 except ImportError:
     COMPONENTS_AVAILABLE = False
-    # Mock SearchFormComponent
-    class SearchFormComponent:
-        def __init__(self, search_function=None, result_key_prefix=None, form_key=None, placeholder="Search...", label="Search", session_state_key="default_search_term", auto_submit=False, button_text="Search"):
-            self.placeholder, self.label, self.session_state_key = placeholder, label, session_state_key
-        def render(self):
-            st.session_state[self.session_state_key] = st.text_input(self.label, value=st.session_state.get(self.session_state_key, ""), placeholder=self.placeholder, key=f"mock_search_asst_med_{self.session_state_key}_v2")
-            return None
-        def get_search_query(self): return st.session_state.get(self.session_state_key, "")
-
-    # Mock MedicationCard - simplified for assistant view (no favorite actions)
-    def MedicationCard(medication_data, actions=None, key=None, show_actions=True): # show_actions default True but we will pass False
-        st.markdown(f"**{medication_data.get('name', 'N/A')}**")
-        st.caption(f"Generic: {medication_data.get('generic_name', 'N/A')} | Class: {medication_data.get('drug_class', 'N/A')}")
-        st.caption(f"Form: {medication_data.get('form', 'N/A')} | Strength: {medication_data.get('strength', 'N/A')}")
-        if show_actions and actions: # Will be False for assistant
-            for action_label, action_func in actions.items(): # This loop won't run if actions is None or show_actions is False
-                if st.button(action_label, key=f"{key}_{action_label.lower().replace(' ', '_')}_asst_med_card_v2"):
-                    action_func()
-        with st.expander("More Info (Mock)", expanded=False):
-            st.write(f"**Indications:** {', '.join(medication_data.get('indications', ['N/A']))}")
-            st.write(f"**Notes:** {medication_data.get('notes', 'N/A')}")
+    from components._mocks import MockSearchFormComponent as SearchFormComponent, MockMedicationCard as MedicationCard
 
 
 # Database Queries (with Mocks)
@@ -51,21 +38,31 @@ except ImportError:
         {'id': 'med004', 'name': 'Metformin 500mg', 'generic_name': 'Metformin', 'drug_class': 'Biguanides', 'form': 'Tablet', 'strength': '500mg', 'indications': ['Type 2 Diabetes'], 'notes': 'Take with meals.'},
         {'id': 'med005', 'name': 'Ibuprofen 200mg', 'generic_name': 'Ibuprofen', 'drug_class': 'NSAIDs', 'form': 'Tablet', 'strength': '200mg', 'indications': ['Pain', 'Inflammation'], 'notes': 'Take with food.'},
     ]
+    # Case-folded search blob computed once here so each query is a single substring check per row
+    for _m in MOCK_MEDS_STORE_ASST:
+        _m['_search_blob'] = (_m['name'] + '\0' + _m.get('generic_name', '')).lower()
+
     class MedicationQueries:
         @staticmethod
         def search_medications(search_term=None, drug_class=None, favorites_only=None, doctor_id=None):
-            results = copy.deepcopy(MOCK_MEDS_STORE_ASST)
-            if search_term:
-                term = search_term.lower()
-                results = [m for m in results if term in m['name'].lower() or term in m.get('generic_name','').lower()]
-            if drug_class and drug_class != "All":
-                results = [m for m in results if m.get('drug_class') == drug_class]
-            return results
+            # Read-only callers: filter the shared store in one pass instead of deep-copying it
+            term = (search_term or "").lower()
+            return [m for m in MOCK_MEDS_STORE_ASST
+                    if term in m['_search_blob']
+                    and (drug_class in (None, "", "All") or m.get('drug_class') == drug_class)]
 
 # Utils
-from utils.helpers import show_error_message, show_success_message, show_warning_message
+from utils.helpers import show_error_message, show_success_message, show_warning_message, fragment
 
 # --- UI Rendering Functions ---
+_SESSION_DEFAULTS = (('asst_med_search_term_v2', ""), ('asst_med_drug_class_v2', "All"))
+_CARD_GRID_MAX_ITEMS = 12
+# Table columns and labels, covering both database and mock field names
+_TABLE_COLUMNS = {
+    'name': 'Name', 'generic_name': 'Generic Name', 'drug_class': 'Drug Class',
+    'form': 'Form', 'dosage_forms': 'Dosage Forms', 'strength': 'Strength', 'strengths': 'Strengths',
+}
+
 def render_assistant_medication_search():
     st.subheader("🔍 Search & Filter Medications")
 
@@ -74,26 +71,28 @@ def render_assistant_medication_search():
 
     filter_cols = st.columns([2, 1])
     with filter_cols[0]:
-        available_drug_classes = DRUG_CLASSES if isinstance(DRUG_CLASSES, list) and DRUG_CLASSES else ["Analgesics", "Antibiotics", "NSAIDs", "ACE Inhibitors", "Biguanides", "Penicillin Antibiotics", "Other"]
-        all_drug_classes_options = ["All"] + sorted(list(set(available_drug_classes)))
-
+        drug_class_options = _asst_drug_class_options()
         current_drug_class = st.session_state.get('asst_med_drug_class_v2', "All")
-        if current_drug_class not in all_drug_classes_options: current_drug_class_index = 0
-        else: current_drug_class_index = all_drug_classes_options.index(current_drug_class)
+        if current_drug_class not in drug_class_options: current_drug_class_index = 0
+        else: current_drug_class_index = drug_class_options.index(current_drug_class)
 
         st.session_state.asst_med_drug_class_v2 = st.selectbox(
             "Filter by Drug Class:",
-            options=all_drug_classes_options,
+            options=drug_class_options,
             index=current_drug_class_index,
             key="asst_med_drug_class_filter_v2"
         )
     with filter_cols[1]:
         st.markdown("<div>&nbsp;</div>", unsafe_allow_html=True)
-        if st.button("🔄 Refresh / Apply", key="asst_med_refresh_btn_v2", use_container_width=True):
-            st.rerun()
+        # The click itself reruns the section; no explicit st.rerun() needed
+        st.button("🔄 Refresh / Apply", key="asst_med_refresh_btn_v2", use_container_width=True)
     st.markdown("---")
 
+@fragment
 def render_assistant_medications_list():
+    # Filter widgets live inside the fragment so changing them reruns only this section
+    render_assistant_medication_search()
+
     st.subheader("Medication Listings")
 
     search_term_val = st.session_state.get('asst_med_search_term_v2', "")
@@ -115,6 +114,14 @@ def render_assistant_medications_list():
         st.info("No medications found matching your criteria.")
         return
 
+    # Larger result sets go to a single virtualized table instead of one card per row
+    if len(medications_data) > _CARD_GRID_MAX_ITEMS:
+        table_df = pd.DataFrame(medications_data)
+        table_columns = [col for col in _TABLE_COLUMNS if col in table_df.columns]
+        st.dataframe(table_df[table_columns], use_container_width=True, hide_index=True,
+                     column_config={col: _TABLE_COLUMNS[col] for col in table_columns})
+        return
+
     num_cols = 3
     item_cols = st.columns(num_cols)
     for i, med_data_item in enumerate(medications_data):
@@ -139,10 +146,8 @@ def show_assistant_medications_page():
     st.markdown("<h1>💊 Medications Database (Assistant View)</h1>", unsafe_allow_html=True)
     st.caption("This is a read-only view of the medications database. Contact a doctor or pharmacist for detailed advice.")
 
-    if 'asst_med_search_term_v2' not in st.session_state: st.session_state.asst_med_search_term_v2 = ""
-    if 'asst_med_drug_class_v2' not in st.session_state: st.session_state.asst_med_drug_class_v2 = "All"
+    for key, default in _SESSION_DEFAULTS: st.session_state.setdefault(key, default)
 
-    render_assistant_medication_search()
     render_assistant_medications_list()
 
 if __name__ == "__main__":
@@ -155,8 +160,7 @@ if __name__ == "__main__":
         st.session_state.authenticated = True
         st.session_state.session_valid_until = datetime.now() + timedelta(hours=1)
 
-    if 'asst_med_search_term_v2' not in st.session_state: st.session_state.asst_med_search_term_v2 = ""
-    if 'asst_med_drug_class_v2' not in st.session_state: st.session_state.asst_med_drug_class_v2 = "All"
+    for key, default in _SESSION_DEFAULTS: st.session_state.setdefault(key, default)
 
     if not COMPONENTS_AVAILABLE: st.sidebar.warning("Using MOCK UI components for Asst. Medications.")
     if not DB_QUERIES_AVAILABLE: st.sidebar.warning("Using MOCK DB Queries for Asst. Medications.")
@@ -1,6 +1,6 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import copy
+import pandas as pd
 
 # Config and Auth
 from config.settings import USER_ROLES, LAB_TEST_CONFIG
@@ -8,6 +8,14 @@ from config.styles import inject_css
 from auth.authentication import require_authentication, get_current_user
 from auth.permissions import require_role_access
 
+# Category filter options are static config; the page script re-runs on every rerun, so they live in a resource cache
+_DEFAULT_LAB_CATEGORIES = ["Hematology", "Chemistry", "Microbiology", "Endocrinology", "Immunology", "Pathology", "Other"]
+
+@st.cache_resource
+def _asst_lab_category_options():
+    cats = LAB_TEST_CONFIG.get('CATEGORIES', _DEFAULT_LAB_CATEGORIES)
+    return ("All",) + tuple(sorted(set(cats if isinstance(cats, list) and cats else _DEFAULT_LAB_CATEGORIES)))
+
 # Components
 try:
     from components.cards import LabTestCard
@@ -15,27 +23,7 @@ try:
     COMPONENTS_AVAILABLE = True
 except ImportError:
     COMPONENTS_AVAILABLE = False
-    # Mock SearchFormComponent
-    class SearchFormComponent:
-        def __init__(self, search_function=None, result_key_prefix=None, form_key=None, placeholder="Search...", label="Search", session_state_key="default_search_term", auto_submit=False, button_text="Search"):
-            self.placeholder, self.label, self.session_state_key = placeholder, label, session_state_key
-        def render(self):
-            st.session_state[self.session_state_key] = st.text_input(self.label, value=st.session_state.get(self.session_state_key, ""), placeholder=self.placeholder, key=f"mock_search_asst_lab_{self.session_state_key}_v2")
-            return None
-        def get_search_query(self): return st.session_state.get(self.session_state_key, "")
-
-    # Mock LabTestCard - simplified for assistant view
-    def LabTestCard(lab_test_data, actions=None, key=None, show_actions=True):
-        st.markdown(f"**{lab_test_data.get('name', 'N/A')}**")
-        st.caption(f"Category: {lab_test_data.get('category', 'N/A')} | Specimen: {lab_test_data.get('specimen_type', 'N/A')}")
-        if show_actions and actions: # This part won't be used for assistant if actions=None or show_actions=False
-             for action_label, action_func in actions.items():
-                if st.button(action_label, key=f"{key}_{action_label.lower().replace(' ', '_')}_asst_lab_card_v2"):
-                    action_func()
-        with st.expander("More Info (Mock)", expanded=False): # Default to collapsed for assistant
-            st.write(f"**Description:** {lab_test_data.get('description', 'N/A')}")
-            st.write(f"**Turnaround Time:** {lab_test_data.get('turnaround_time', 'N/A')}")
-            st.write(f"**Preparation:** {lab_test_data.get('preparation_instructions', 'N/A')}")
+    from components._mocks import MockSearchFormComponent as SearchFormComponent, MockLabTestCard as LabTestCard
 
 
 # Database Queries (with Mocks)
@@ -51,21 +39,31 @@ except ImportError:
         {'id': 'lab004', 'name': 'TSH (Thyroid Stimulating Hormone)', 'category': 'Endocrinology', 'specimen_type': 'Serum', 'turnaround_time': '24 hours', 'description': 'Assesses thyroid function.', 'preparation_instructions': 'None.'},
         {'id': 'lab005', 'name': 'Glucose, Fasting', 'category': 'Chemistry', 'specimen_type': 'Plasma', 'turnaround_time': '1-2 hours', 'description': 'Measures blood sugar levels after fasting.', 'preparation_instructions': '8-10 hour fast required.'},
     ]
+    # Case-folded search blob computed once here so each query is a single substring check per row
+    for _lt in MOCK_LAB_TESTS_STORE_ASST:
+        _lt['_search_blob'] = (_lt['name'] + '\0' + _lt.get('description', '')).lower()
+
     class LabTestQueries:
         @staticmethod
         def search_lab_tests(search_term=None, category=None):
-            results = copy.deepcopy(MOCK_LAB_TESTS_STORE_ASST)
-            if search_term:
-                term = search_term.lower()
-                results = [lt for lt in results if term in lt['name'].lower() or term in lt.get('description','').lower()]
-            if category and category != "All":
-                results = [lt for lt in results if lt.get('category') == category]
-            return results
+            # Read-only callers: filter the shared store in one pass instead of deep-copying it
+            term = (search_term or "").lower()
+            return [lt for lt in MOCK_LAB_TESTS_STORE_ASST
+                    if term in lt['_search_blob']
+                    and (category in (None, "", "All") or lt.get('category') == category)]
 
 # Utils
-from utils.helpers import show_error_message, show_success_message, show_warning_message
+from utils.helpers import show_error_message, show_success_message, show_warning_message, fragment
 
 # --- UI Rendering Functions ---
+_SESSION_DEFAULTS = (('asst_lab_search_term_v2', ""), ('asst_lab_category_v2', "All"))
+_CARD_GRID_MAX_ITEMS = 12
+# Table columns and labels, covering both database and mock field names
+_TABLE_COLUMNS = {
+    'name': 'Name', 'test_name': 'Test Name', 'category': 'Category', 'test_category': 'Category',
+    'specimen_type': 'Specimen', 'sample_type': 'Sample Type', 'turnaround_time': 'Turnaround Time',
+}
+
 def render_assistant_lab_test_search():
     st.subheader("🔍 Search & Filter Lab Tests")
 
@@ -74,32 +72,28 @@ def render_assistant_lab_test_search():
 
     filter_cols = st.columns([2, 1])
     with filter_cols[0]:
-        default_categories = ["Hematology", "Chemistry", "Microbiology", "Endocrinology", "Immunology", "Pathology", "Other"]
-        config_categories = LAB_TEST_CONFIG.get('CATEGORIES', default_categories)
-        if not isinstance(config_categories, list) or not config_categories:
-            available_categories = default_categories
-        else:
-            available_categories = config_categories
-
-        all_category_options = ["All"] + sorted(list(set(available_categories)))
-
+        category_options = _asst_lab_category_options()
         current_category = st.session_state.get('asst_lab_category_v2', "All")
-        if current_category not in all_category_options: current_category_index = 0
-        else: current_category_index = all_category_options.index(current_category)
+        if current_category not in category_options: current_category_index = 0
+        else: current_category_index = category_options.index(current_category)
 
         st.session_state.asst_lab_category_v2 = st.selectbox(
             "Filter by Test Category:",
-            options=all_category_options,
+            options=category_options,
             index=current_category_index,
             key="asst_lab_category_filter_v2"
         )
     with filter_cols[1]:
         st.markdown("<div>&nbsp;</div>", unsafe_allow_html=True)
-        if st.button("🔄 Refresh / Apply", key="asst_lab_refresh_btn_v2", use_container_width=True):
-            st.rerun()
+        # The click itself reruns the section; no explicit st.rerun() needed
+        st.button("🔄 Refresh / Apply", key="asst_lab_refresh_btn_v2", use_container_width=True)
     st.markdown("---")
 
+@fragment
 def render_assistant_lab_tests_list():
+    # Filter widgets live inside the fragment so changing them reruns only this section
+    render_assistant_lab_test_search()
+
     st.subheader("Lab Test Listings")
 
     search_term_val = st.session_state.get('asst_lab_search_term_v2', "")
@@ -121,6 +115,14 @@ def render_assistant_lab_tests_list():
         st.info("No lab tests found matching your criteria.")
         return
 
+    # Larger result sets go to a single virtualized table instead of one card per row
+    if len(lab_tests_data) > _CARD_GRID_MAX_ITEMS:
+        table_df = pd.DataFrame(lab_tests_data)
+        table_columns = [col for col in _TABLE_COLUMNS if col in table_df.columns]
+        st.dataframe(table_df[table_columns], use_container_width=True, hide_index=True,
+                     column_config={col: _TABLE_COLUMNS[col] for col in table_columns})
+        return
+
     num_cols = 3
     item_cols = st.columns(num_cols)
     for i, test_data_item in enumerate(lab_tests_data):
@@ -143,10 +145,8 @@ def show_assistant_lab_tests_page():
     st.markdown("<h1>🧪 Lab Tests Database (Assistant View)</h1>", unsafe_allow_html=True)
     st.caption("This is a read-only view of the lab tests database.")
 
-    if 'asst_lab_search_term_v2' not in st.session_state: st.session_state.asst_lab_search_term_v2 = ""
-    if 'asst_lab_category_v2' not in st.session_state: st.session_state.asst_lab_category_v2 = "All"
+    for key, default in _SESSION_DEFAULTS: st.session_state.setdefault(key, default)
 
-    render_assistant_lab_test_search()
     render_assistant_lab_tests_list()
 
 if __name__ == "__main__":
@@ -159,8 +159,7 @@ if __name__ == "__main__":
         st.session_state.authenticated = True
         st.session_state.session_valid_until = datetime.now() + timedelta(hours=1)
 
-    if 'asst_lab_search_term_v2' not in st.session_state: st.session_state.asst_lab_search_term_v2 = ""
-    if 'asst_lab_category_v2' not in st.session_state: st.session_state.asst_lab_category_v2 = "All"
+    for key, default in _SESSION_DEFAULTS: st.session_state.setdefault(key, default)
 
     if not COMPONENTS_AVAILABLE: st.sidebar.warning("Using MOCK UI components for Asst. Lab Tests.")
     if not DB_QUERIES_AVAILABLE: st.sidebar.warning("Using MOCK DB Queries for Asst. Lab Tests.")
@@ -1,6 +1,8 @@
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
+import zlib
 import pandas as pd # For creating sample DataFrames for charts
+import numpy as np
 
 # Config and Auth
 from config.settings import USER_ROLES
@@ -10,42 +12,59 @@ from auth.permissions import require_role_access
 
 # Services & Components (Assuming these exist, with fallbacks)
 try:
-    from services.analytics_service import AnalyticsService
+    from services.analytics_service import get_analytics_service
 except ImportError:
+    # Synthetic daily counts: base + scale*(i % period) - (i % square_mod)**2 + i // step + seed, floored at 0
+    def _gen_counts(n, base, scale, period, square_mod, step, seed):
+        i = np.arange(n)
+        return np.maximum(0, base + scale * (i % period) - (i % square_mod)**2 + i // step + seed)
+
+    def _uid_seed(user_id):
+        # Deterministic across processes, unlike the salted built-in hash()
+        return zlib.adler32(str(user_id).encode()) & 0xFF
+
+    def _mock_date_range(days_back, today):
+        # Shared by both mock methods; results are already cached by the st.cache_data wrappers below
+        return pd.date_range(today - timedelta(days=days_back), today, freq='D')
+
     class AnalyticsService: # Mock service
         def get_patient_analytics(self, role, user_id, days_back):
             # st.warning("AnalyticsService (get_patient_analytics) not found. Using mock data.", icon="⚠️") # Less verbose for final
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            date_range = pd.date_range(start_date, end_date, freq='D')
-            registrations_count = [max(0, int(3 + 2 * (i % 5) - (i % 2)**2 + i//7 + hash(user_id)%3)) for i in range(len(date_range))]
+            date_range = _mock_date_range(days_back, date.today())
+            registrations_count = _gen_counts(len(date_range), 3, 2, 5, 2, 7, _uid_seed(user_id)%3)
             return {
                 'patient_registrations_timeline': pd.DataFrame({
                     'date': date_range,
-                    'count': registrations_count
+                    'count': registrations_count.astype(np.int16)
                 }),
-                'total_patients_registered': sum(registrations_count)
+                'total_patients_registered': int(registrations_count.sum())
             }
 
         def get_visit_analytics(self, role, user_id, days_back):
             # st.warning("AnalyticsService (get_visit_analytics) not found. Using mock data.", icon="⚠️") # Less verbose for final
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            date_range = pd.date_range(start_date, end_date, freq='D')
-            visits_count = [max(0, int(5 + 3 * (i % 7) - (i % 3)**2 + i//5 + hash(user_id)%4)) for i in range(len(date_range))]
+            date_range = _mock_date_range(days_back, date.today())
+            seed = _uid_seed(user_id)
+            visits_count = _gen_counts(len(date_range), 5, 3, 7, 3, 5, seed%4)
+            total_visits = int(visits_count.sum())
             visit_types = ['Check-up', 'Follow-up', 'New Complaint', 'Vaccination', 'Scheduled Consultation']
             return {
                 'visit_recordings_timeline': pd.DataFrame({
                     'date': date_range,
-                    'count': visits_count
+                    'count': visits_count.astype(np.int16)
                 }),
-                'total_visits_recorded': sum(visits_count),
+                'total_visits_recorded': total_visits,
                 'visit_types_distribution': pd.DataFrame({
-                    'visit_type': visit_types,
-                    'count': [max(0, int(sum(visits_count)/(i+2) + (hash(user_id) % (i+1)*2) )) for i in range(len(visit_types))]
+                    'visit_type': pd.Categorical(visit_types),
+                    'count': np.array([max(0, int(total_visits/(i+2) + (seed % (i+1)*2) )) for i in range(len(visit_types))], dtype=np.int16)
                 })
             }
 
+    # Page-specific name: every page script runs as __main__, so a name shared with another page would share its cache entry
+    @st.cache_resource
+    def _assistant_analytics_mock_service():
+        return AnalyticsService()
+    get_analytics_service = _assistant_analytics_mock_service
+
 try:
     from components.charts import TimeSeriesChart, BarChart
     CHARTS_AVAILABLE = True
@@ -68,10 +87,23 @@ except ImportError:
         else: st.info(f"No data or incorrect format for BarChart: {title if title else ''}.")
 
 # Utils
-from utils.helpers import show_error_message, show_success_message, show_warning_message
+from utils.helpers import show_error_message, show_success_message, show_warning_message, fragment
+
+
+_PERIOD_OPTIONS = (7, 15, 30, 60, 90)
+
+# --- Cached Data Access ---
+@st.cache_data(ttl=600, show_spinner=False)
+def _get_patient_analytics(role, user_id, days_back):
+    return get_analytics_service().get_patient_analytics(role, user_id, days_back=days_back)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _get_visit_analytics(role, user_id, days_back):
+    return get_analytics_service().get_visit_analytics(role, user_id, days_back=days_back)
 
 
 # --- Main Rendering Function ---
+@fragment
 def render_assistant_analytics_content(assistant: dict):
     st.markdown("### Your Activity Overview")
 
@@ -79,7 +111,7 @@ def render_assistant_analytics_content(assistant: dict):
     with col1:
         selected_period_days = st.selectbox(
             "Select Period:",
-            options=[7, 15, 30, 60, 90],
+            options=_PERIOD_OPTIONS,
             format_func=lambda x: f"Last {x} days",
             index=2, # Default to 30 days
             key="asst_analytics_period_select_v2"
@@ -87,14 +119,15 @@ def render_assistant_analytics_content(assistant: dict):
     with col3:
         st.markdown("<div>&nbsp;</div>", unsafe_allow_html=True)
         if st.button("🔄 Refresh Data", key="refresh_asst_analytics_v2", use_container_width=True):
-            st.rerun()
+            # The click already reruns this section; just drop cached results so it refetches
+            _get_patient_analytics.clear()
+            _get_visit_analytics.clear()
 
     st.markdown("---")
 
     try:
-        analytics_service = AnalyticsService()
-        patient_reg_analytics = analytics_service.get_patient_analytics(USER_ROLES['ASSISTANT'], assistant['id'], days_back=selected_period_days)
-        visit_rec_analytics = analytics_service.get_visit_analytics(USER_ROLES['ASSISTANT'], assistant['id'], days_back=selected_period_days)
+        patient_reg_analytics = _get_patient_analytics(USER_ROLES['ASSISTANT'], assistant['id'], selected_period_days)
+        visit_rec_analytics = _get_visit_analytics(USER_ROLES['ASSISTANT'], assistant['id'], selected_period_days)
     except Exception as e:
         show_error_message(f"Error fetching analytics data: {e}")
         patient_reg_analytics, visit_rec_analytics = {}, {}
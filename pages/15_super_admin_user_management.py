@@ -487,18 +487,17 @@ def show_user_analytics():
     # User creation timeline
     st.markdown("### 📈 User Registration Timeline")
     
-    # Group users by creation date
-    from collections import defaultdict
-    user_timeline = defaultdict(int)
+    # Group users by the ISO date prefix, then validate each distinct day once rather than parsing every row
+    from collections import Counter, defaultdict
+    day_counts = Counter(str(user['created_at'])[:10] for user in all_users if user.get('created_at'))
+    user_timeline = {}
     
-    for user in all_users:
-        created_at = user.get('created_at', '')
-        if created_at:
-            try:
-                date_obj = datetime.fromisoformat(created_at.replace('Z', '+00:00')).date()
-                user_timeline[date_obj.strftime('%Y-%m-%d')] += 1
-            except:
-                continue
+    for day, count in day_counts.items():
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            continue
+        user_timeline[day] = count
     
     if user_timeline:
         timeline_data = [
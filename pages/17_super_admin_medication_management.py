@@ -8,6 +8,11 @@ from config.styles import inject_css
 from auth.authentication import require_authentication, get_current_user
 from auth.permissions import require_role_access
 
+# Filter options are fixed by config; the page script re-runs on every rerun, so they live in a resource cache
+@st.cache_resource
+def _sa_drug_class_options():
+    return ("All",) + tuple(sorted(set(DRUG_CLASSES if isinstance(DRUG_CLASSES, list) and DRUG_CLASSES else ["Other"])))
+
 # Components (with Mocks)
 try:
     from components.forms import MedicationFormComponent, SearchFormComponent
@@ -91,10 +96,13 @@ except ImportError:
     class MedicationQueries:
         @staticmethod
         def search_medications(search_term=None, drug_class=None, is_active=None, favorites_only=None, doctor_id=None):
-            results = copy.deepcopy(MOCK_MEDS_DB_SA)
-            if search_term: term = search_term.lower(); results = [m for m in results if term in m['name'].lower() or term in m.get('generic_name','').lower()]
-            if drug_class and drug_class != "All": results = [m for m in results if m.get('drug_class') == drug_class]
-            if is_active is not None: results = [m for m in results if m.get('is_active') == is_active]
+            # One pass with all predicates; only matching records are copied
+            term = (search_term or "").lower()
+            class_filter = drug_class if drug_class and drug_class != "All" else None
+            results = [copy.deepcopy(m) for m in MOCK_MEDS_DB_SA
+                       if (not term or term in m['name'].lower() or term in m.get('generic_name','').lower())
+                       and (class_filter is None or m.get('drug_class') == class_filter)
+                       and (is_active is None or m.get('is_active') == is_active)]
             return sorted(results, key=lambda x: x['name']) # Sort alphabetically
         @staticmethod
         def get_medication_details(medication_id):
@@ -175,9 +183,7 @@ def render_sa_manage_medications_tab(admin_user: dict):
 
     filter_cols = st.columns(2)
     with filter_cols[0]:
-        default_drug_classes = ["Other"] # Fallback if DRUG_CLASSES is empty or not a list
-        available_drug_classes_list = DRUG_CLASSES if isinstance(DRUG_CLASSES, list) and DRUG_CLASSES else default_drug_classes
-        all_drug_classes_options = ["All"] + sorted(list(set(available_drug_classes_list)))
+        all_drug_classes_options = _sa_drug_class_options()
 
         current_drug_class_filter = st.session_state.get('sa_med_drug_class_filter_v2', "All") # Key updated
         if current_drug_class_filter not in all_drug_classes_options: current_drug_class_filter = "All" # Ensure valid default
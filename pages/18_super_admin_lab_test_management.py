@@ -8,6 +8,14 @@ from config.styles import inject_css
 from auth.authentication import require_authentication, get_current_user
 from auth.permissions import require_role_access
 
+# Filter options are fixed by config; the page script re-runs on every rerun, so they live in a resource cache
+@st.cache_resource
+def _sa_lab_category_options():
+    default_cats = LAB_TEST_CONFIG.get('DEFAULT_CATEGORIES', ["Other"])
+    cats_list = LAB_TEST_CONFIG.get('CATEGORIES', default_cats)
+    if not isinstance(cats_list, list) or not cats_list: cats_list = default_cats
+    return ("All",) + tuple(sorted(set(cats_list)))
+
 # Components (with Mocks)
 try:
     from components.forms import LabTestFormComponent # Assuming this will be created
@@ -176,10 +184,7 @@ def render_sa_manage_lab_tests_tab(admin_user: dict):
 
     filter_cols = st.columns(2)
     with filter_cols[0]:
-        default_cats = LAB_TEST_CONFIG.get('DEFAULT_CATEGORIES', ["Other"]) # Use a config default or hardcoded
-        cats_list = LAB_TEST_CONFIG.get('CATEGORIES', default_cats)
-        if not isinstance(cats_list, list) or not cats_list: cats_list = default_cats
-        all_cats_options = ["All"] + sorted(list(set(cats_list)))
+        all_cats_options = _sa_lab_category_options()
 
         current_cat_filter = st.session_state.get('sa_lab_test_category_filter_v2', "All") # Key updated
         if current_cat_filter not in all_cats_options: current_cat_filter = "All"
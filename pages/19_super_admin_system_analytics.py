@@ -11,7 +11,7 @@ from auth.permissions import require_role_access
 
 # Mock Services, Queries, and Components if not available
 try:
-    from services.analytics_service import AnalyticsService
+    from services.analytics_service import get_analytics_service
 except ImportError:
     class AnalyticsService: # Mock service
         def get_system_performance_metrics(self, days_back=7):
@@ -32,6 +32,12 @@ except ImportError:
         # Add other necessary methods if AnalyticsService is supposed to provide more direct data
         # For example, get_user_registration_summary, get_prescription_creation_summary etc.
 
+    # Page-specific name: every page script runs as __main__, so a name shared with another page would share its cache entry
+    @st.cache_resource
+    def _system_analytics_mock_service():
+        return AnalyticsService()
+    get_analytics_service = _system_analytics_mock_service
+
 try:
     from database.queries import AnalyticsQueries, DashboardQueries, UserQueries
     if not hasattr(UserQueries, 'get_all_users'):
@@ -181,7 +187,7 @@ def render_user_activity_tab(days_filter):
 def render_system_health_tab(days_filter):
     st.subheader("System Performance & Error Monitoring")
     try:
-        health = AnalyticsService().get_system_performance_metrics(days_back=days_filter)
+        health = get_analytics_service().get_system_performance_metrics(days_back=days_filter)
         h_cols = st.columns(3)
         h_cols[0].metric("Error Rate (24h)", f"{health.get('error_rate_last_24h', 0):.2f}%")
         h_cols[1].metric("Active Users (24h)", health.get('active_users_last_24h', 'N/A'))
@@ -200,7 +206,7 @@ def render_system_health_tab(days_filter):
 def render_database_stats_tab():
     st.subheader("Database Information")
     try:
-        db_m = AnalyticsService().get_system_performance_metrics() # Mock includes DB stats
+        db_m = get_analytics_service().get_system_performance_metrics() # Mock includes DB stats
         db_cols = st.columns(3)
         db_cols[0].metric("DB Size", f"{db_m.get('db_size_mb', 0):.2f} MB"); db_cols[1].metric("Total Tables", db_m.get('db_table_count', 'N/A')); db_cols[2].metric("Total Records (Est.)", f"{db_m.get('db_total_records', 0):,}")
 
@@ -1,6 +1,6 @@
 import streamlit as st
+import pandas as pd
 from datetime import datetime, timedelta
-import copy
 
 # Config and Auth
 from config.settings import USER_ROLES, LAB_TEST_CONFIG
@@ -18,6 +18,21 @@ from database.queries import LabTestQueries # Assuming this exists
 # Utils
 from utils.helpers import show_error_message, show_success_message, show_warning_message
 
+# Category filter options are fixed by config; the page script re-runs on every rerun, so they live in a resource cache
+_DEFAULT_LAB_CATEGORIES = ["Hematology", "Chemistry", "Microbiology", "Endocrinology", "Immunology", "Pathology"]
+
+@st.cache_resource
+def _doctor_lab_category_options():
+    cats = LAB_TEST_CONFIG.get('CATEGORIES', _DEFAULT_LAB_CATEGORIES)
+    return ("All",) + tuple(sorted(set(cats if isinstance(cats, list) and cats else _DEFAULT_LAB_CATEGORIES)))
+
+_CARD_GRID_MAX_ITEMS = 30
+# Table columns and labels, covering both database and mock field names
+_TABLE_COLUMNS = {
+    'name': 'Name', 'test_name': 'Test Name', 'category': 'Category', 'test_category': 'Category',
+    'specimen_type': 'Specimen', 'sample_type': 'Sample Type', 'turnaround_time': 'Turnaround Time',
+}
+
 # --- Mock Data Store ---
 MOCK_LAB_TESTS_DB = [
     {'id': 'lab001', 'name': 'Complete Blood Count (CBC)', 'category': 'Hematology', 'specimen_type': 'Whole blood', 'turnaround_time': '2-4 hours', 'reference_range': 'Varies by parameter', 'description': 'Measures different components of blood.', 'preparation_instructions': 'None typically required.'},
@@ -28,21 +43,16 @@ MOCK_LAB_TESTS_DB = [
     {'id': 'lab006', 'name': 'Hemoglobin A1c (HbA1c)', 'category': 'Endocrinology', 'specimen_type': 'Whole blood', 'turnaround_time': '24-48 hours', 'reference_range': '<5.7% (non-diabetic)', 'description': 'Average blood glucose over past 2-3 months.', 'preparation_instructions': 'None typically required.'}
 ]
 
-def get_mock_lab_tests(search_term: str, category: str):
-    results = copy.deepcopy(MOCK_LAB_TESTS_DB)
-
-    if search_term:
-        search_term_lower = search_term.lower()
-        results = [
-            lt for lt in results if
-            search_term_lower in lt['name'].lower() or
-            search_term_lower in lt.get('description', '').lower()
-        ]
-
-    if category != "All":
-        results = [lt for lt in results if lt.get('category') == category]
+# Case-folded search blob stored alongside each record so each query is a single substring check per row
+for _lt in MOCK_LAB_TESTS_DB:
+    _lt['_search_blob'] = (_lt['name'] + '\0' + _lt.get('description', '')).lower()
 
-    return results
+def get_mock_lab_tests(search_term: str, category: str):
+    # Read-only callers: filter the shared store in one pass instead of deep-copying it
+    term = (search_term or "").lower()
+    return [lt for lt in MOCK_LAB_TESTS_DB
+            if term in lt['_search_blob']
+            and (category == "All" or lt.get('category') == category)]
 
 # --- UI Rendering Functions ---
 def render_lab_test_search_and_filters():
@@ -56,15 +66,7 @@ def render_lab_test_search_and_filters():
 
     filter_cols = st.columns([2, 1])
     with filter_cols[0]:
-        default_categories = ["Hematology", "Chemistry", "Microbiology", "Endocrinology", "Immunology", "Pathology"]
-        # Use LAB_TEST_CONFIG if available and is a list, otherwise use default
-        config_categories = LAB_TEST_CONFIG.get('CATEGORIES', default_categories)
-        if not isinstance(config_categories, list) or not config_categories:
-            available_categories = default_categories
-        else:
-            available_categories = config_categories
-
-        all_category_options = ["All"] + sorted(list(set(available_categories)))
+        all_category_options = _doctor_lab_category_options()
 
         current_category = st.session_state.get('lab_test_category', "All")
         if current_category not in all_category_options:
@@ -109,6 +111,14 @@ def render_lab_tests_list():
         st.info("No lab tests found matching your criteria. Try adjusting your search or filters.")
         return
 
+    # Larger result sets go to a single virtualized table instead of one card per row
+    if len(lab_tests_list_data) > _CARD_GRID_MAX_ITEMS:
+        table_df = pd.DataFrame(lab_tests_list_data)
+        table_columns = [col for col in _TABLE_COLUMNS if col in table_df.columns]
+        st.dataframe(table_df[table_columns], use_container_width=True, hide_index=True,
+                     column_config={col: _TABLE_COLUMNS[col] for col in table_columns})
+        return
+
     num_columns = 3
     item_cols = st.columns(num_columns)
     for i, test_item_data_obj in enumerate(lab_tests_list_data):
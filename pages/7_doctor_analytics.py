@@ -1,5 +1,6 @@
 import streamlit as st
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd # For creating sample DataFrames for charts
 
 # Config and Auth
@@ -10,55 +11,75 @@ from auth.permissions import require_role_access
 
 # Services & Components (Assuming these exist, with fallbacks)
 try:
-    from services.analytics_service import AnalyticsService
+    from services.analytics_service import get_analytics_service
 except ImportError:
+    # Label columns are Arrow-backed (pyarrow ships with Streamlit), so handing them to charts needs no object->Arrow conversion
+    _LABEL_DTYPE = "string[pyarrow]"
+    _I5 = np.arange(5) # Row positions for the fixed five-row mock breakdowns
+
     class AnalyticsService: # Mock service
         def get_prescription_analytics(self, role, user_id, days_back):
             st.warning("AnalyticsService not found. Using mock prescription analytics.")
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days_back)
             date_range = pd.date_range(start_date, end_date, freq='D')
-            count_data = [max(0, int(5 + 3 * (i % 7) - (i % 3)**2 + i//5)) for i in range(len(date_range))] # More varied data
+            i = np.arange(len(date_range), dtype=np.int32)
+            count_data = np.maximum(0, 5 + 3 * (i % 7) - (i % 3)**2 + i//5) # More varied data
+            total = int(count_data.sum())
             return {
                 'prescriptions_timeline': pd.DataFrame({
                     'date': date_range,
                     'count': count_data
                 }),
-                'total_prescriptions': sum(count_data),
-                'average_meds_per_prescription': 2.5 if sum(count_data) > 0 else 0
+                'total_prescriptions': total,
+                'average_meds_per_prescription': 2.5 if total > 0 else 0
             }
         def get_patient_analytics(self, role, user_id, days_back): # For patients this doctor interacted with
             st.warning("AnalyticsService not found. Using mock patient analytics.")
             return {
-                'patient_demographics': pd.DataFrame({
-                    'age_group': ['0-18', '19-35', '36-50', '51-65', '65+'],
-                    'count': [max(0, int(days_back/10 + i*2 - (i%2)*5)) for i in range(5)] # Data varies with days_back
+                'patient_demographics_df': pd.DataFrame({
+                    'age_group': pd.array(['0-18', '19-35', '36-50', '51-65', '65+'], dtype=_LABEL_DTYPE),
+                    'count': np.maximum(0, (days_back/10 + _I5*2 - (_I5%2)*5).astype(int)) # Data varies with days_back
                 }),
-                'gender_distribution': pd.DataFrame({
-                    'gender': ['Male', 'Female', 'Other', 'Prefer not to say'],
-                    'count': [max(0,int(days_back/5 + i*3)) for i in range(4)]
+                'gender_df': pd.DataFrame({
+                    'gender': pd.array(['Male', 'Female', 'Other', 'Prefer not to say'], dtype=_LABEL_DTYPE),
+                    'count': np.maximum(0, (days_back/5 + _I5[:4]*3).astype(int))
                 }),
-                'new_vs_returning_patients': {'new': max(0,int(days_back/3)), 'returning': max(0,int(days_back*2/3))}
+                'kpi_new': max(0, int(days_back/3)),
+                'kpi_returning': max(0, int(days_back*2/3))
+            }
+        def get_full_analytics(self, role, user_id, days_back):
+            return {
+                'prescriptions': self.get_prescription_analytics(role, user_id, days_back),
+                'patients': self.get_patient_analytics(role, user_id, days_back),
+                'medications': self.get_medication_analytics(role, user_id, days_back)
             }
         def get_medication_analytics(self, role, user_id, days_back):
             st.warning("AnalyticsService not found. Using mock medication analytics.")
             med_names = ['Amoxicillin', 'Lisinopril', 'Metformin', 'Paracetamol', 'Salbutamol', 'Aspirin', 'Omeprazole']
             return {
                 'most_prescribed_medications': pd.DataFrame({
-                    'medication_name': med_names[:5],
-                    'prescription_count': [max(0,int(days_back/6 + i*2)) for i in range(5)]
+                    'medication_name': pd.array(med_names[:5], dtype=_LABEL_DTYPE),
+                    'prescription_count': np.maximum(0, (days_back/6 + _I5*2).astype(int))
                 }),
                 'prescription_by_drug_class': pd.DataFrame({
-                    'drug_class': ['Antibiotics', 'ACE Inhibitors', 'Biguanides', 'Analgesics', 'Bronchodilators'],
-                    'count': [max(0,int(days_back/5 + i)) for i in range(5)]
+                    'drug_class': pd.array(['Antibiotics', 'ACE Inhibitors', 'Biguanides', 'Analgesics', 'Bronchodilators'], dtype=_LABEL_DTYPE),
+                    'count': np.maximum(0, (days_back/5 + _I5).astype(int))
                 })
             }
 
+    # Page-specific name: every page script runs as __main__, so a name shared with another page would share its cache entry
+    @st.cache_resource
+    def _doctor_analytics_mock_service():
+        return AnalyticsService()
+    get_analytics_service = _doctor_analytics_mock_service
+
 try:
     from components.charts import (
         PrescriptionTrendChart,
         PatientDemographicsChart,
         MedicationUsageChart,
+        FacetedBarChart,
         AnalyticsDashboard
     )
     # If AnalyticsDashboard exists, we might prefer it.
@@ -69,7 +90,7 @@ except ImportError:
     def create_mock_chart_component(name):
         def MockChartComponent(data, title=None):
             if title: st.caption(title)
-            if isinstance(data, pd.DataFrame) and not data.empty:
+            if isinstance(data, pd.DataFrame) and len(data):
                 try:
                     st.bar_chart(data.set_index(data.columns[0]))
                 except Exception as e:
@@ -85,6 +106,15 @@ except ImportError:
     PatientDemographicsChart = create_mock_chart_component("Patient Demographics Chart")
     MedicationUsageChart = create_mock_chart_component("Medication Usage Chart")
 
+    class FacetedBarChart:
+        def __init__(self, panels, title=None, **kwargs):
+            self.panels = panels
+            self.title = title
+        def render(self):
+            if self.title: st.caption(self.title)
+            for panel in self.panels:
+                create_mock_chart_component(panel.get('title', "Bar Chart"))(panel['data'], title=panel.get('title'))
+
     class AnalyticsDashboard:
         def __init__(self, data=None, title=None):
             self.data = data
@@ -98,10 +128,21 @@ except ImportError:
 
 
 # Utils
-from utils.helpers import show_error_message, show_success_message, show_warning_message
+from utils.helpers import show_error_message, show_success_message, show_warning_message, fragment
+
+
+_PERIOD_OPTIONS = (7, 30, 60, 90, 180, 365)
+
+# --- Cached Data Access ---
+# Keyed on (doctor_id, days_back) so reruns from unrelated widget interactions don't hit the service again
+@st.cache_data(ttl=300, show_spinner=False)
+def _full_analytics(doctor_id, days_back: int):
+    return get_analytics_service().get_full_analytics(USER_ROLES['DOCTOR'], doctor_id, days_back=days_back)
 
 
 # --- Main Rendering Function ---
+# Period and refresh interactions rerun only this section; the cache is keyed on days_back so earlier periods stay warm
+@fragment
 def render_analytics_content(doctor: dict):
     st.markdown("### Analytics Overview")
 
@@ -109,22 +150,27 @@ def render_analytics_content(doctor: dict):
     with col1:
         selected_period_days = st.selectbox(
             "Select Period:",
-            options=[7, 30, 60, 90, 180, 365],
+            options=_PERIOD_OPTIONS,
             format_func=lambda x: f"Last {x} days" if x != 365 else "Last Year",
-            index=1 # Default to 30 days
+            index=1, # Default to 30 days
+            key="doctor_analytics_period_select"
         )
     with col2:
         st.markdown("<div>&nbsp;</div>", unsafe_allow_html=True)
+        # The click itself reruns the page, so clearing the caches is enough to refetch
         if st.button("🔄 Refresh Data", key="refresh_analytics_main", use_container_width=True):
-            st.rerun()
+            _full_analytics.clear()
 
     st.markdown("---")
 
     try:
-        analytics_service = AnalyticsService()
-        prescription_analytics = analytics_service.get_prescription_analytics(USER_ROLES['DOCTOR'], doctor['id'], days_back=selected_period_days)
-        patient_analytics = analytics_service.get_patient_analytics(USER_ROLES['DOCTOR'], doctor['id'], days_back=selected_period_days)
-        medication_analytics = analytics_service.get_medication_analytics(USER_ROLES['DOCTOR'], doctor['id'], days_back=selected_period_days)
+        full_analytics = _full_analytics(doctor['id'], selected_period_days)
+        # Section errors come back as data, so they are shown on cache hits too
+        for message in full_analytics.get('errors', ()):
+            show_error_message(message)
+        prescription_analytics = full_analytics.get('prescriptions', {})
+        patient_analytics = full_analytics.get('patients', {})
+        medication_analytics = full_analytics.get('medications', {})
     except Exception as e:
         show_error_message(f"Error fetching analytics data: {e}")
         prescription_analytics, patient_analytics, medication_analytics = {}, {}, {}
@@ -142,7 +188,7 @@ def render_analytics_content(doctor: dict):
         kpi_cols_rx[1].metric(label="Avg. Meds per Prescription", value=f"{avg_meds:.1f}" if isinstance(avg_meds, (int,float)) else "N/A")
 
         timeline_data = prescription_analytics.get('prescriptions_timeline')
-        if timeline_data is not None and not timeline_data.empty:
+        if timeline_data is not None and len(timeline_data):
             PrescriptionTrendChart(timeline_data, title=f"Prescription Volume (Last {selected_period_days} Days)")
         else:
             st.info("No prescription timeline data available.")
@@ -153,38 +199,42 @@ def render_analytics_content(doctor: dict):
     st.header("Medication Analytics")
     if medication_analytics:
         med_usage_data = medication_analytics.get('most_prescribed_medications')
-        if med_usage_data is not None and not med_usage_data.empty:
-            MedicationUsageChart(med_usage_data, title=f"Most Prescribed Medications (Last {selected_period_days} Days)")
+        drug_class_data = medication_analytics.get('prescription_by_drug_class')
+        # Both breakdowns go into one figure as side-by-side panels
+        medication_panels = []
+        if med_usage_data is not None and len(med_usage_data):
+            medication_panels.append({'title': "Most Prescribed Medications", 'data': med_usage_data,
+                                      'x_field': 'medication_name', 'y_field': 'prescription_count'})
         else:
             st.info("No data on most prescribed medications.")
-
-        drug_class_data = medication_analytics.get('prescription_by_drug_class')
-        if drug_class_data is not None and not drug_class_data.empty:
-            # Assuming MedicationUsageChart can also display this or a similar component exists
-            MedicationUsageChart(drug_class_data, title=f"Prescriptions by Drug Class (Last {selected_period_days} Days)")
+        if drug_class_data is not None and len(drug_class_data):
+            medication_panels.append({'title': "Prescriptions by Drug Class", 'data': drug_class_data,
+                                      'x_field': 'drug_class', 'y_field': 'count'})
         else:
             st.info("No data on prescriptions by drug class.")
+        if medication_panels:
+            FacetedBarChart(medication_panels, title=f"Medication Usage (Last {selected_period_days} Days)").render()
     else:
         st.info("No medication analytics data available.")
 
     st.markdown("---")
     st.header("Patient Analytics")
     if patient_analytics:
-        new_patients = patient_analytics.get('new_vs_returning_patients', {}).get('new', 0)
-        returning_patients = patient_analytics.get('new_vs_returning_patients', {}).get('returning', 0)
+        new_patients = patient_analytics.get('kpi_new')
+        returning_patients = patient_analytics.get('kpi_returning')
 
         kpi_cols_pt = st.columns(2)
         kpi_cols_pt[0].metric(label=f"New Patients (Last {selected_period_days} Days)", value=new_patients if new_patients is not None else "N/A")
         kpi_cols_pt[1].metric(label=f"Returning Patients (Last {selected_period_days} Days)", value=returning_patients if returning_patients is not None else "N/A")
 
-        demographics_data = patient_analytics.get('patient_demographics')
-        if demographics_data is not None and not demographics_data.empty:
+        demographics_data = patient_analytics.get('patient_demographics_df')
+        if demographics_data is not None:
             PatientDemographicsChart(demographics_data, title="Patient Age Groups")
         else:
             st.info("No patient age demographics data.")
 
-        gender_data = patient_analytics.get('gender_distribution')
-        if gender_data is not None and not gender_data.empty:
+        gender_data = patient_analytics.get('gender_df')
+        if gender_data is not None:
             # Using mock chart directly for this if PatientDemographicsChart is specific
             st.caption("Patient Gender Distribution")
             st.bar_chart(gender_data.set_index(gender_data.columns[0]))
@@ -522,7 +522,7 @@ Focus on clinically significant interactions and provide actionable recommendati
         return interactions
     
     def _check_patient_allergies(self, medications: List[Dict[str, Any]], 
-                               patient_context: Dict[str, Any]]) -> List[Dict[str, Any]]:
+                               patient_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check medications against patient allergies"""
         allergies = []
         
@@ -547,7 +547,7 @@ Focus on clinically significant interactions and provide actionable recommendati
         return allergies
     
     def _check_basic_contraindications(self, medications: List[Dict[str, Any]], 
-                                     patient_context: Dict[str, Any]]) -> List[Dict[str, Any]]:
+                                     patient_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check for basic contraindications"""
         contraindications = []
         
@@ -662,9 +662,11 @@ def analyze_prescription_safety(medications: List[Dict[str, Any]],
     
     return ai_service.analyze_drug_interactions(medications, patient_context)
 
+@st.cache_resource(show_spinner=False)
 def is_ai_available() -> bool:
     """
-    Check if AI analysis is available
+    Check if AI analysis is available. Cached for the process, so a newly
+    added API key is picked up after a restart or is_ai_available.clear().
     
     Returns:
         bool: True if AI service is configured and available
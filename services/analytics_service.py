@@ -4,6 +4,9 @@ This file handles analytics data processing, metrics calculation, and reporting.
 """
 
 import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
@@ -13,6 +16,25 @@ from config.settings import ANALYTICS_CONFIG, USER_ROLES
 from utils.formatters import format_date_display, format_currency, format_percentage
 from auth.authentication import get_current_user_id, get_current_user_role
 
+# Set only inside get_full_analytics workers, which collect error messages instead of touching the UI
+_worker_errors = threading.local()
+
+def _report_error(message: str):
+    """Show an error with st.error, or collect it when running in a get_full_analytics worker"""
+    messages = getattr(_worker_errors, 'messages', None)
+    if messages is None:
+        st.error(message)
+    else:
+        messages.append(message)
+
+def _collect_errors(fn, *args):
+    """Run fn in a worker thread and return (result, error messages)"""
+    _worker_errors.messages = []
+    try:
+        return fn(*args), _worker_errors.messages
+    finally:
+        _worker_errors.messages = None
+
 class AnalyticsService:
     """Service for analytics data processing and reporting"""
     
@@ -211,15 +233,21 @@ class AnalyticsService:
             else:
                 doctor_filter = ""
             
-            # Prescriptions over time
-            prescriptions_timeline_query = f"""
-            SELECT date(created_at) as date, COUNT(*) as count
+            # Timeline, status and diagnosis breakdowns all come from one scan of the same prescriptions
+            prescriptions_query = f"""
+            SELECT date(created_at) as date, status, diagnosis
             FROM prescriptions
             WHERE created_at >= {date_filter} {doctor_filter}
-            GROUP BY date(created_at)
-            ORDER BY date
             """
-            analytics['prescriptions_timeline'] = self._execute_analytics_query(prescriptions_timeline_query)
+            prescription_rows = self._execute_analytics_query(prescriptions_query)
+            by_date = Counter(row['date'] for row in prescription_rows)
+            by_status = Counter(row['status'] for row in prescription_rows)
+            by_diagnosis = Counter(row['diagnosis'] for row in prescription_rows if row['diagnosis'])
+            
+            # Prescriptions over time
+            analytics['prescriptions_timeline'] = [
+                {'date': day, 'count': count} for day, count in sorted(by_date.items())
+            ]
             
             # Top medications prescribed
             top_medications_query = f"""
@@ -235,25 +263,14 @@ class AnalyticsService:
             analytics['top_medications'] = self._execute_analytics_query(top_medications_query)
             
             # Prescription status distribution
-            status_query = f"""
-            SELECT status, COUNT(*) as count
-            FROM prescriptions
-            WHERE created_at >= {date_filter} {doctor_filter}
-            GROUP BY status
-            """
-            analytics['status_distribution'] = self._execute_analytics_query(status_query)
+            analytics['status_distribution'] = [
+                {'status': status, 'count': count} for status, count in by_status.items()
+            ]
             
             # Top diagnoses
-            diagnoses_query = f"""
-            SELECT diagnosis, COUNT(*) as count
-            FROM prescriptions
-            WHERE created_at >= {date_filter} {doctor_filter}
-            AND diagnosis IS NOT NULL AND diagnosis != ''
-            GROUP BY diagnosis
-            ORDER BY count DESC
-            LIMIT 10
-            """
-            analytics['top_diagnoses'] = self._execute_analytics_query(diagnoses_query)
+            analytics['top_diagnoses'] = [
+                {'diagnosis': diagnosis, 'count': count} for diagnosis, count in by_diagnosis.most_common(10)
+            ]
             
             # Lab tests frequency
             lab_tests_query = f"""
@@ -271,7 +288,7 @@ class AnalyticsService:
             return analytics
         
         except Exception as e:
-            st.error(f"Error getting prescription analytics: {str(e)}")
+            _report_error(f"Error getting prescription analytics: {str(e)}")
             return {}
     
     def _get_limited_prescription_analytics(self, assistant_id: int, date_filter: str) -> Dict[str, Any]:
@@ -328,6 +345,8 @@ class AnalyticsService:
                 assistant_filter = ""
             else:
                 assistant_filter = ""
+            # Same scope as assistant_filter, qualified for queries that join patients as p
+            patient_scope_filter = f"AND p.created_by = {user_id}" if assistant_filter else ""
             
             # Patient registrations over time
             registrations_query = f"""
@@ -375,10 +394,24 @@ class AnalyticsService:
             """
             analytics['visit_types'] = self._execute_analytics_query(visit_types_query)
             
+            # Scalar KPIs and chart-ready frames, so render code only checks for None
+            analytics['kpi_new'] = self._get_count(f"""
+            SELECT COUNT(*) FROM patients
+            WHERE created_at >= {date_filter} {assistant_filter}
+            """)
+            analytics['kpi_returning'] = self._get_count(f"""
+            SELECT COUNT(DISTINCT pv.patient_id)
+            FROM patient_visits pv
+            JOIN patients p ON p.id = pv.patient_id
+            WHERE pv.visit_date >= date({date_filter}) AND p.created_at < {date_filter} {patient_scope_filter}
+            """)
+            analytics['patient_demographics_df'] = self._to_frame(analytics['age_distribution'])
+            analytics['gender_df'] = self._to_frame(analytics['gender_distribution'])
+            
             return analytics
         
         except Exception as e:
-            st.error(f"Error getting patient analytics: {str(e)}")
+            _report_error(f"Error getting patient analytics: {str(e)}")
             return {}
     
     def get_medication_analytics(self, user_role: str, user_id: int = None) -> Dict[str, Any]:
@@ -431,9 +464,36 @@ class AnalyticsService:
             return analytics
         
         except Exception as e:
-            st.error(f"Error getting medication analytics: {str(e)}")
+            _report_error(f"Error getting medication analytics: {str(e)}")
             return {}
     
+    def get_full_analytics(self, user_role: str, user_id: int = None, 
+                           days_back: int = None) -> Dict[str, Any]:
+        """
+        Get prescription, patient and medication analytics in one call
+        
+        Args:
+            user_role (str): User role
+            user_id (int): User ID for filtering
+            days_back (int): Number of days to analyze
+        
+        Returns:
+            Dict[str, Any]: Analytics keyed by 'prescriptions', 'patients' and 'medications',
+            plus 'errors', the error messages for the caller to display
+        """
+        # The sections read through separate connections and don't depend on each other, so they run concurrently
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = {
+                'prescriptions': pool.submit(_collect_errors, self.get_prescription_analytics, user_role, user_id, days_back),
+                'patients': pool.submit(_collect_errors, self.get_patient_analytics, user_role, user_id, days_back),
+                'medications': pool.submit(_collect_errors, self.get_medication_analytics, user_role, user_id)
+            }
+            analytics = {'errors': []}
+            for section, future in futures.items():
+                analytics[section], errors = future.result()
+                analytics['errors'].extend(errors)
+            return analytics
+    
     def get_system_performance_metrics(self) -> Dict[str, Any]:
         """
         Get system performance metrics (admin only)
@@ -625,15 +685,31 @@ class AnalyticsService:
         except Exception:
             return 0
     
+    def _to_frame(self, rows: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+        """Convert query rows to an Arrow-backed DataFrame, or None when there are none"""
+        if not rows:
+            return None
+        return pd.DataFrame(rows).convert_dtypes(dtype_backend='pyarrow')
+    
     def _execute_analytics_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Execute analytics query and return results"""
         try:
             return execute_query(query, params, fetch='all')
         except Exception as e:
-            st.error(f"Analytics query failed: {str(e)}")
+            _report_error(f"Analytics query failed: {str(e)}")
             return []
 
 # Convenience functions for easy access
+@st.cache_resource
+def get_analytics_service() -> AnalyticsService:
+    """
+    Get the shared analytics service instance
+    
+    Returns:
+        AnalyticsService: Process-wide service instance, built on first use
+    """
+    return AnalyticsService()
+
 def get_user_dashboard_metrics(days_back: int = None) -> Dict[str, Any]:
     """
     Get dashboard metrics for current user
@@ -650,7 +726,7 @@ def get_user_dashboard_metrics(days_back: int = None) -> Dict[str, Any]:
     if not user_role or not user_id:
         return {}
     
-    analytics_service = AnalyticsService()
+    analytics_service = get_analytics_service()
     return analytics_service.get_dashboard_metrics(user_role, user_id, days_back)
 
 def get_user_prescription_analytics(days_back: int = None) -> Dict[str, Any]:
@@ -669,7 +745,7 @@ def get_user_prescription_analytics(days_back: int = None) -> Dict[str, Any]:
     if not user_role or not user_id:
         return {}
     
-    analytics_service = AnalyticsService()
+    analytics_service = get_analytics_service()
     return analytics_service.get_prescription_analytics(user_role, user_id, days_back)
 
 def get_user_patient_analytics(days_back: int = None) -> Dict[str, Any]:
@@ -688,7 +764,7 @@ def get_user_patient_analytics(days_back: int = None) -> Dict[str, Any]:
     if not user_role or not user_id:
         return {}
     
-    analytics_service = AnalyticsService()
+    analytics_service = get_analytics_service()
     return analytics_service.get_patient_analytics(user_role, user_id, days_back)
 
 def export_user_data(data_type: str, date_range: Tuple[date, date] = None) -> pd.DataFrame:
@@ -708,7 +784,7 @@ def export_user_data(data_type: str, date_range: Tuple[date, date] = None) -> pd
     if not user_role or not user_id:
         return pd.DataFrame()
     
-    analytics_service = AnalyticsService()
+    analytics_service = get_analytics_service()
     return analytics_service.get_export_data(data_type, user_role, user_id, date_range)
 
 def log_analytics_event(action_type: str, entity_type: str = None, 
@@ -759,7 +835,7 @@ def get_analytics_summary() -> Dict[str, Any]:
         if not user_role:
             return {}
         
-        analytics_service = AnalyticsService()
+        analytics_service = get_analytics_service()
         
         # Get basic metrics
         metrics = analytics_service.get_dashboard_metrics(user_role, get_current_user_id())
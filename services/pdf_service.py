@@ -265,7 +265,7 @@ class PDFGenerationService:
         
         # Prescription ID and date
         prescription_id = prescription_data.get('prescription_id', 'Unknown')
-        created_date = prescription_data.get('created_at', datetime.now())
+        created_date = prescription_data.get('created_at') or datetime.now()
         
         if isinstance(created_date, str):
             try:
@@ -612,7 +612,7 @@ def get_pdf_preview_data(prescription_data: Dict[str, Any]) -> Dict[str, Any]:
         'medication_count': len(medications),
         'lab_test_count': len(lab_tests),
         'created_date': format_date_display(
-            prescription_data.get('created_at', datetime.now())
+            prescription_data.get('created_at') or datetime.now()
         ),
         'estimated_pages': max(1, (len(medications) + len(lab_tests)) // 10 + 1)
     }
@@ -6,9 +6,11 @@ This file contains functions to format data for display in the user interface.
 import re
 import json
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
 from config.settings import DATE_FORMATS, CHART_CONFIG
 
+@lru_cache(maxsize=2048)
 def format_patient_name(first_name: str, last_name: str, format_type: str = 'full') -> str:
     """
     Format patient name for display
@@ -203,6 +205,7 @@ def format_datetime_display(datetime_obj: Union[str, datetime], include_seconds:
     except (ValueError, AttributeError, TypeError):
         return str(datetime_obj) if datetime_obj else "N/A"
 
+@lru_cache(maxsize=2048)
 def format_time_display(time_obj: Union[str, datetime], format_12hour: bool = True) -> str:
     """
     Format time for display
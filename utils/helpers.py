@@ -8,6 +8,7 @@ import uuid
 import re
 import json
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, List, Any, Union
 import streamlit as st
 from config.settings import (
@@ -118,6 +119,22 @@ def format_datetime(datetime_obj: Union[datetime, str], format_type: str = 'TIME
     except (ValueError, AttributeError):
         return str(datetime_obj)
 
+@lru_cache(maxsize=1024)
+def parse_date(date_str: str) -> Optional[date]:
+    """
+    Parse an input-format date string, memoized so form redraws don't re-parse it
+    
+    Args:
+        date_str (str): Date string in DATE_FORMATS['INPUT'] format
+    
+    Returns:
+        Optional[date]: Parsed date, or None if the string is not a valid date
+    """
+    try:
+        return datetime.strptime(date_str, DATE_FORMATS['INPUT']).date()
+    except ValueError:
+        return None
+
 def calculate_age(birth_date: Union[date, str]) -> int:
     """
     Calculate age from birth date
@@ -130,7 +147,7 @@ def calculate_age(birth_date: Union[date, str]) -> int:
     """
     try:
         if isinstance(birth_date, str):
-            birth_date = datetime.strptime(birth_date, DATE_FORMATS['INPUT']).date()
+            birth_date = parse_date(birth_date)
         
         today = date.today()
         age = today.year - birth_date.year
@@ -383,6 +400,21 @@ def show_info_message(message: str, key: Optional[str] = None) -> None:
     else:
         st.info(message, icon="ℹ️")
 
+def fragment(func):
+    """
+    Decorate a render function so widget interactions inside it rerun only that
+    function instead of the whole page. Falls back to a plain call on Streamlit
+    versions without fragment support.
+    
+    Args:
+        func: Render function to isolate
+    
+    Returns:
+        Decorated render function
+    """
+    decorator = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    return decorator(func) if decorator else func
+
 def format_list_for_display(items: List[str], separator: str = ", ", max_items: int = 3) -> str:
     """
     Format list of items for display with truncation